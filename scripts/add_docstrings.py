@@ -6,23 +6,78 @@ los docstrings según el estándar de Google.
 import os
 import re
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-def find_python_files(directory):
+def iter_python_files(directory):
     """
-    Encuentra todos los archivos Python en el directorio especificado y sus subdirectorios.
+    Recorre el directorio especificado y sus subdirectorios entregando los archivos Python.
+    
+    Usa os.scandir para aprovechar la información de tipo de cada entrada sin
+    llamadas stat adicionales, y entrega las rutas de forma perezosa.
     
     Args:
         directory (str): Directorio raíz donde buscar archivos Python.
         
+    Yields:
+        str: Ruta a cada archivo Python encontrado.
+    """
+    def scan(path):
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from scan(entry.path)
+                elif entry.name[-3:] == '.py' and entry.is_file(follow_symlinks=False):
+                    yield entry.path
+
+    yield from scan(directory)
+
+def bounded_map(executor, fn, items, max_pending):
+    """
+    Como executor.map, pero consume items de forma perezosa: nunca hay más de
+    max_pending tareas enviadas sin recoger.
+    
+    Args:
+        executor (ThreadPoolExecutor): Executor donde se ejecutan las tareas.
+        fn (callable): Función a aplicar a cada elemento.
+        items (iterable): Elementos de entrada (puede ser un generador).
+        max_pending (int): Máximo de tareas en vuelo.
+        
+    Yields:
+        Los resultados de fn, en el mismo orden que items.
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+def process_file(file_path):
+    """
+    Lee un archivo Python y calcula su contenido con el docstring de módulo añadido.
+    
+    Args:
+        file_path (str): Ruta al archivo Python a procesar.
+        
     Returns:
-        list: Lista de rutas a archivos Python encontrados.
+        tuple: (file_path, nuevo_contenido_en_bytes) o (file_path, None) si el
+        archivo ya tiene docstrings y no requiere cambios.
     """
-    python_files = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.py'):
-                python_files.append(os.path.join(root, file))
-    return python_files
+    with open(file_path, 'rb') as f:
+        content = f.read()
+        
+    # Verificar si el archivo ya tiene docstrings (en cualquier parte del archivo)
+    if b'"""' in content:
+        return file_path, None
+    
+    # Aquí se implementaría la lógica para añadir docstrings
+    # Este es un ejemplo simplificado que solo añade un docstring al inicio del archivo
+    module_name = os.path.basename(file_path)
+    docstring = f'"""\n{module_name} - Módulo del Revisor de Juntas para EVoting.\n"""\n'
+    return file_path, docstring.encode('utf-8') + content
 
 def main():
     """
@@ -36,36 +91,27 @@ def main():
     
     # Encontrar archivos Python
     src_dir = os.path.join(project_dir, 'src')
-    python_files = find_python_files(src_dir)
+    processed_count = 0
     
-    print(f"Encontrados {len(python_files)} archivos Python para documentar.")
-    
-    # Procesar cada archivo
-    for file_path in python_files:
-        print(f"Procesando {file_path}...")
-        
-        # Leer el contenido del archivo
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Verificar si el archivo ya tiene docstrings
-        if '"""' in content:
-            print(f"  El archivo ya tiene docstrings. Saltando.")
-            continue
-        
-        # Aquí se implementaría la lógica para añadir docstrings
-        # Este es un ejemplo simplificado que solo añade un docstring al inicio del archivo
-        if not content.startswith('"""'):
-            module_name = os.path.basename(file_path)
-            docstring = f'"""\n{module_name} - Módulo del Revisor de Juntas para EVoting.\n"""\n'
-            content = docstring + content
+    # La lectura es I/O-bound: se procesan los archivos en paralelo y solo se
+    # escriben los que realmente requieren modificación.
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # El recorrido del árbol sigue siendo perezoso: solo se envían unas pocas
+        # tareas por worker por delante de las que ya se recogieron
+        results = bounded_map(executor, process_file, iter_python_files(src_dir), max_workers * 2)
+        for file_path, new_content in results:
+            processed_count += 1
+            print(f"Procesando {file_path}...")
+            if new_content is None:
+                print(f"  El archivo ya tiene docstrings. Saltando.")
+                continue
             
             # Escribir el contenido actualizado
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
+            Path(file_path).write_bytes(new_content)
             print(f"  Añadido docstring al módulo.")
     
+    print(f"Procesados {processed_count} archivos Python.")
     print("Documentación completada.")
 
 if __name__ == "__main__":
@@ -2,23 +2,52 @@
 Módulo para manejar la autenticación y sesiones en EVoting.
 """
 import os
+import re
 import json
-import pickle
 import time
 import logging
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from datetime import datetime
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from urllib.parse import urlparse
 
-from src.config import EVOTING_BASE_URL, EVOTING_USERNAME, EVOTING_PASSWORD
+from src.config import (
+    EVOTING_BASE_URL,
+    EVOTING_BASE_URL_PARSED,
+    EVOTING_BASE_URL_NETLOC,
+    EVOTING_USERNAME,
+    EVOTING_PASSWORD,
+    ROOT_DIR,
+)
+
+# Ruta al archivo de cookies, resuelta una sola vez al importar el módulo
+_COOKIES_FILE = os.path.join(ROOT_DIR, "data", "cookies.json")
+
+# Subcadenas típicas de rutas de autenticación, evaluadas en una sola pasada
+_AUTH_KEYWORDS = ("login", "signin", "auth", "sso", "callback", "logout", "error")
+_AUTH_KEYWORDS_RE = re.compile("|".join(_AUTH_KEYWORDS), re.IGNORECASE)
+
+# Devuelve el primer botón submit cuyo texto sea "Iniciar sesión" o "Ingresar" (o null)
+_FIND_LOGIN_BUTTON_BY_TEXT_JS = (
+    "const r = /Iniciar sesión|Ingresar/;"
+    "return [...document.querySelectorAll('button[type=submit]')]"
+    ".find(b => r.test(b.innerText)) || null;"
+)
 
 class AuthManager:
     """
     Clase para manejar la autenticación y sesiones en la plataforma EVoting.
     """
+
+    # Localizadores reutilizados entre llamadas a login/logout
+    _USERNAME_LOC = (By.NAME, "username")
+    _PASSWORD_LOC = (By.NAME, "password")
+    _SUBMIT_LOC = (By.CSS_SELECTOR, "button[type='submit']")
+    _INGRESAR_LOC = (By.XPATH, "//button[normalize-space()='Ingresar']")
+    # El enlace de logout se reconoce por href o por texto (esto último solo con XPath)
+    _LOGOUT_LOC = (By.XPATH, "//a[contains(@href, 'logout') or contains(text(), 'Cerrar sesión')]")
+    _LOGOUT_DONE_LOC = (By.CSS_SELECTOR, "#username")
     
     def __init__(self, driver, login_url=None):
         """
@@ -30,9 +59,26 @@ class AuthManager:
                                        Si es None, usa EVOTING_BASE_URL.
         """
         self.driver = driver
-        self.cookies_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cookies.pkl")
-        # Usar la URL proporcionada o la de configuración por defecto
-        self.login_url = login_url if login_url else f"{EVOTING_BASE_URL}/"
+        self.cookies_file = _COOKIES_FILE
+        # Usar la URL proporcionada o la de configuración por defecto.
+        # La URL de login no cambia tras la inicialización: se parsea una sola vez
+        # (o se reutiliza el parseo de src.config) para no repetir el trabajo
+        # en cada chequeo de is_logged_in.
+        if login_url:
+            self.login_url = login_url
+            self._login_parsed = urlparse(login_url)
+            self._base_site_domain = self._login_parsed.netloc
+        else:
+            self.login_url = f"{EVOTING_BASE_URL}/"
+            self._login_parsed = EVOTING_BASE_URL_PARSED
+            self._base_site_domain = EVOTING_BASE_URL_NETLOC
+        self._base_prefix = f"{self._login_parsed.scheme}://{self._base_site_domain}"
+        self._login_url_stripped = self.login_url.rstrip('/')
+        self._login_has_path = bool(self._login_parsed.path.strip('/'))
+        # Espera corta reutilizable, con sondeo cada 100ms en vez de los 500ms por defecto;
+        # un elemento re-renderizado entre sondeos no corta la espera
+        self._fast_wait = WebDriverWait(driver, 5, poll_frequency=0.1,
+                                        ignored_exceptions=(StaleElementReferenceException,))
         logging.info(f"AuthManager inicializado para URL de login: {self.login_url}")
         
     def login(self, username=None, password=None):
@@ -56,49 +102,10 @@ class AuthManager:
         
         logging.info(f"Iniciando proceso de login en {self.login_url} con usuario: {login_username}")
         
-        # Intentar cargar cookies existentes
-        # NOTA: La validez de las cookies depende del dominio. Si los dominios son diferentes
-        # (ej. evoting.com vs dcv.evoting.com), las cookies de uno no servirán para el otro.
-        # Se podría hacer el archivo de cookies dependiente de la URL, pero por ahora se omite.
-        if os.path.exists(self.cookies_file):
-            try:
-                logging.info(f"Intentando usar cookies guardadas ({self.cookies_file})...")
-                # Primero navegar a la página de login del dominio correcto para poder aplicar cookies
-                self.driver.get(self.login_url) 
-                logging.info(f"Navegado a URL de login: {self.driver.current_url}")
-                
-                # # Cargar cookies guardadas
-                # with open(self.cookies_file, 'rb') as file:
-                #     cookies = pickle.load(file)
-                #     logging.info(f"Cargadas {len(cookies)} cookies")
-                #     for cookie in cookies:
-                #         # Intentar añadir cookie, podría fallar si el dominio no coincide
-                #         try:
-                #             # Quitar expiry si existe, causa problemas a veces
-                #             if 'expiry' in cookie: del cookie['expiry'] 
-                #             self.driver.add_cookie(cookie)
-                #         except Exception as cookie_err:
-                #             logging.warning(f"No se pudo añadir la cookie (dominio podría no coincidir?): {cookie}. Error: {cookie_err}")
-                
-                # Recargar la página para aplicar las cookies
-                logging.info("Recargando página para aplicar cookies...")
-                self.driver.refresh()
-                time.sleep(1)  # Aumentar tiempo para procesamiento
-                logging.info(f"URL después de recargar: {self.driver.current_url}")
-                
-                # Verificar si el login automático funcionó (usando is_logged_in)
-                if self.is_logged_in():
-                    logging.info(f"Login exitoso con cookies guardadas para {self.login_url}")
-                    return True
-                else:
-                    logging.warning(f"Las cookies ({self.cookies_file}) han expirado o no funcionaron para {self.login_url}. Realizando login manual...")
-            except Exception as e:
-                logging.error(f"Error al cargar/aplicar cookies: {str(e)}. Realizando login manual...", exc_info=True)
-        
-        # Si las cookies fallaron o no existían, proceder con login manual
+        # Login manual con credenciales
         try:
             # Navegar a la página de inicio de sesión (si no se hizo ya)
-            if self.driver.current_url.rstrip('/') != self.login_url.rstrip('/'):
+            if self.driver.current_url.rstrip('/') != self._login_url_stripped:
                 logging.info(f"Navegando a página de login: {self.login_url}")
                 self.driver.get(self.login_url)
                 logging.info(f"URL actual: {self.driver.current_url}")
@@ -107,44 +114,43 @@ class AuthManager:
 
             # --- Intento de clic en 'Ingresar' inicial (si aplica) ---
             # Esta lógica puede variar entre las UIs (evoting vs dcv)
-            # Intentamos hacerlo más robusto: buscar el botón, si no, buscar el username directamente
-            username_field_locator = (By.NAME, "username")
+            # Una sola espera compuesta: lo que aparezca primero entre el campo username
+            # y el botón 'Ingresar' decide el camino, con menos round-trips al navegador.
             try:
-                # Verificar si el campo username ya está visible
-                self.driver.find_element(*username_field_locator)
-                logging.info("Campo username encontrado directamente. Procediendo a ingresar credenciales.")
-            except NoSuchElementException:
-                # Si no está visible, buscar el botón 'Ingresar'
-                logging.info("Campo username no visible. Buscando botón 'Ingresar' inicial...")
-                ingresar_button_locator = (By.XPATH, "//button[normalize-space()='Ingresar']")
-                try:
-                    ingresar_button = WebDriverWait(self.driver, 7).until(
-                        EC.element_to_be_clickable(ingresar_button_locator)
+                first_element = WebDriverWait(self.driver, 10, poll_frequency=0.1,
+                                              ignored_exceptions=(StaleElementReferenceException,)).until(
+                    EC.any_of(
+                        EC.visibility_of_element_located(self._USERNAME_LOC),
+                        EC.element_to_be_clickable(self._INGRESAR_LOC)
                     )
-                    ingresar_button.click()
+                )
+                if first_element.tag_name.lower() == "button":
+                    logging.info("Campo username no visible. Haciendo clic en botón 'Ingresar' inicial...")
+                    first_element.click()
                     logging.info("Clic en 'Ingresar' inicial realizado. Esperando formulario...")
                     # Esperar a que el campo username aparezca después del clic
-                    WebDriverWait(self.driver, 5).until(
-                        EC.visibility_of_element_located(username_field_locator)
+                    email_input = self._fast_wait.until(
+                        EC.visibility_of_element_located(self._USERNAME_LOC)
                     )
                     logging.info("Campo username apareció después del clic.")
-                except TimeoutException:
-                    logging.error("No se pudo encontrar o hacer clic en 'Ingresar' Y el campo username no apareció/existió.")
-                    # Capturar screenshot podría ser útil aquí para depurar la UI
-                    return False
-                except Exception as click_err:
-                    logging.error(f"Error inesperado al hacer clic en 'Ingresar': {click_err}")
-                    return False
+                else:
+                    email_input = first_element
+                    logging.info("Campo username encontrado directamente. Procediendo a ingresar credenciales.")
+            except TimeoutException:
+                logging.error("No se pudo encontrar o hacer clic en 'Ingresar' Y el campo username no apareció/existió.")
+                # Capturar screenshot podría ser útil aquí para depurar la UI
+                return False
+            except Exception as click_err:
+                logging.error(f"Error inesperado al hacer clic en 'Ingresar': {click_err}")
+                return False
 
             # --- Ingresar credenciales --- 
             logging.info("Ingresando credenciales...")
-            email_input = self.driver.find_element(*username_field_locator)
             email_input.clear()
             email_input.send_keys(login_username)
             
-            password_input_locator = (By.NAME, "password")
-            password_input = WebDriverWait(self.driver, 5).until(
-                EC.visibility_of_element_located(password_input_locator)
+            password_input = self._fast_wait.until(
+                EC.visibility_of_element_located(self._PASSWORD_LOC)
             )
             password_input.clear()
             password_input.send_keys(login_password)
@@ -152,28 +158,26 @@ class AuthManager:
             # --- Clic en botón de login --- 
             logging.info("Haciendo clic en botón de login...")
             # Usar un selector más genérico que podría funcionar en ambas UIs
-            login_button_locator = (By.XPATH, "//button[@type='submit']") 
+            # CSS se resuelve con querySelector nativo; XPath queda solo para coincidencias por texto
             try:
-                login_button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable(login_button_locator)
+                login_button = self._fast_wait.until(
+                    EC.element_to_be_clickable(self._SUBMIT_LOC)
                 )
                 login_button.click()
                 logging.info(f"CLIC LOGIN HECHO. URL Inmediata: {self.driver.current_url}")
             except TimeoutException:
                  logging.error("No se encontró el botón de submit del login.")
-                 # Intentar con el texto específico como fallback (puede variar)
-                 try:
-                     login_button_locator_text = (By.XPATH, "//button[@type='submit' and (contains(., 'Iniciar sesión') or contains(., 'Ingresar'))]")
-                     login_button = WebDriverWait(self.driver, 2).until(
-                        EC.element_to_be_clickable(login_button_locator_text)
-                     )
-                     login_button.click()
+                 # Intentar con el texto específico como fallback (puede variar).
+                 # Se busca y se hace clic en el navegador con un solo script.
+                 login_button = self.driver.execute_script(_FIND_LOGIN_BUTTON_BY_TEXT_JS)
+                 if login_button is not None:
+                     self.driver.execute_script("arguments[0].click();", login_button)
                      logging.info(f"CLIC LOGIN (Fallback) HECHO. URL Inmediata: {self.driver.current_url}")
-                 except TimeoutException:
+                 else:
                       logging.error("Tampoco se encontró el botón de login por texto.")
                       # Capturar estado antes de retornar False
                       try:
-                          ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+                          ts = time.strftime("%Y%m%d_%H%M%S")
                           screenshot_path = f"error_screenshot_login_btn_{ts}.png"
                           self.driver.save_screenshot(screenshot_path)
                           logging.info(f"Screenshot guardado en: {screenshot_path}")
@@ -184,25 +188,27 @@ class AuthManager:
             # --- Esperar y verificar login --- 
             logging.info("Esperando completar login...")
             try:
-                # --- Modificación para loggear durante la espera --- 
+                # Backoff exponencial: detecta logins rápidos en ~100ms sin
+                # sondear de más cuando el login tarda.
                 max_wait = 35 # Segundos
-                interval = 2  # Segundos entre chequeos
-                elapsed_time = 0
+                max_interval = 2.0  # Segundos máximos entre chequeos
+                delay = 0.1
+                start_time = time.monotonic()
+                deadline = start_time + max_wait
                 login_success = False
-                # login_url_base = self.login_url.rstrip('/') # No longer primary check
 
-                while elapsed_time < max_wait:
+                while time.monotonic() < deadline:
                     current_url = self.driver.current_url
-                    # logging.info(f"[Esperando Login] URL: {current_url} | ...detailed conditions...") # Old logging
 
                     if self.is_logged_in(current_url_override=current_url):
                         logging.info(f"Login parece exitoso. URL actual: {current_url}")
                         login_success = True
                         break
                     
-                    logging.info(f"[Esperando Login] URL: {current_url} | Tiempo: {elapsed_time}s")
-                    time.sleep(interval)
-                    elapsed_time += interval
+                    elapsed_time = time.monotonic() - start_time
+                    logging.info(f"[Esperando Login] URL: {current_url} | Tiempo: {elapsed_time:.1f}s")
+                    time.sleep(delay)
+                    delay = min(delay * 2, max_interval)
 
                 if login_success:
                     self._save_cookies()
@@ -234,8 +240,10 @@ class AuthManager:
             os.makedirs(os.path.dirname(self.cookies_file), exist_ok=True)
             
             # Guardar cookies
-            with open(self.cookies_file, 'wb') as file:
-                pickle.dump(self.driver.get_cookies(), file)
+            # Las cookies de Selenium son dicts serializables: JSON es más liviano
+            # que pickle y no permite ejecutar código al cargarlas.
+            with open(self.cookies_file, 'w', encoding='utf-8') as file:
+                json.dump(self.driver.get_cookies(), file)
             print("Cookies guardadas correctamente")
         except Exception as e:
             print(f"Error al guardar cookies: {str(e)}")
@@ -249,12 +257,12 @@ class AuthManager:
         """
         try:
             # Buscar y hacer clic en el botón o enlace de cierre de sesión
-            logout_button = self.driver.find_element(By.XPATH, "//a[contains(@href, 'logout') or contains(text(), 'Cerrar sesión')]")
+            logout_button = self.driver.find_element(*self._LOGOUT_LOC)
             logout_button.click()
             
             # Esperar a que se complete el cierre de sesión
-            WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located((By.ID, "username"))
+            self._fast_wait.until(
+                EC.presence_of_element_located(self._LOGOUT_DONE_LOC)
             )
             
             # Eliminar el archivo de cookies si existe
@@ -270,9 +278,9 @@ class AuthManager:
     
     def get_requests_cookies(self) -> dict:
         """Formatea las cookies de Selenium para ser usadas con requests."""
-        selenium_cookies = self.driver.get_cookies()
-        requests_cookies = {cookie['name']: cookie['value'] for cookie in selenium_cookies}
-        logging.info(f"Formateadas {len(requests_cookies)} cookies para requests.")
+        requests_cookies = {cookie['name']: cookie['value'] for cookie in self.driver.get_cookies()}
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info(f"Formateadas {len(requests_cookies)} cookies para requests.")
         return requests_cookies
     
     def is_logged_in(self, current_url_override=None) -> bool:
@@ -294,43 +302,43 @@ class AuthManager:
                 logging.warning("URL actual no válida o no disponible para is_logged_in.")
                 return False
 
-            login_page_parsed = urlparse(self.login_url)
-            current_page_parsed = urlparse(current_url)
-
-            base_site_domain = login_page_parsed.netloc
-            current_domain = current_page_parsed.netloc
-
-            # Condición 1: El dominio actual debe coincidir con el dominio de la página de login.
-            if current_domain != base_site_domain:
-                logging.debug(f"[is_logged_in] Dominio actual ({current_domain}) no coincide con dominio base ({base_site_domain}).")
+            # Condición 1: La URL actual debe estar en el mismo esquema y dominio que la página de login.
+            # Un startswith resuelve el caso común sin parsear la URL completa.
+            if not current_url.startswith(self._base_prefix):
+                logging.debug(f"[is_logged_in] URL actual ({current_url}) no está en el dominio base ({self._base_prefix}).")
+                return False
+            remainder = current_url[len(self._base_prefix):]
+            if remainder and remainder[0] not in "/?#":
+                # Mismo prefijo pero otro host o puerto (ej. app.com.otro.cl, app.com:8080)
+                logging.debug(f"[is_logged_in] URL actual ({current_url}) no está en el dominio base ({self._base_prefix}).")
                 return False
+            # Solo se necesita la ruta: se descartan fragmento y query sin volver a parsear.
+            current_path = remainder.partition('#')[0].partition('?')[0]
 
             # Condición 2: No debemos estar en la URL exacta de login (a menos que sea idéntica al dominio base, poco probable).
-            if current_url.rstrip('/') == self.login_url.rstrip('/'):
+            if current_url.rstrip('/') == self._login_url_stripped:
                 logging.debug(f"[is_logged_in] Aún en la página de login exacta: {current_url}")
                 return False
             
             # Condición 3: La ruta actual no debe contener subcadenas típicas de páginas de autenticación.
             # Esto ayuda a filtrar redirecciones intermedias (ej. auth0, sso, etc.)
-            auth_keywords = ["login", "signin", "auth", "sso", "callback", "logout", "error"]
-            current_path_lower = current_page_parsed.path.lower()
-            if any(keyword in current_path_lower for keyword in auth_keywords):
+            if _AUTH_KEYWORDS_RE.search(current_path):
                 # Excepción: si la URL base ya es algo como /admin/login, esto podría ser problemático.
                 # Pero dado que estamos verificando no estar en la self.login_url exacta, esto debería ser seguro.
                 # Si la URL base es 'esocios.evoting.com' y la URL de login es 'esocios.evoting.com/superadmin/login'
                 # y estamos en 'esocios.evoting.com/superadmin/organisations', no debería haber problema.
                 # Si estamos en 'esocios.evoting.com/callback?code=...' esto es un problema.
-                logging.debug(f"[is_logged_in] URL path ({current_page_parsed.path}) contiene keyword de autenticación.")
+                logging.debug(f"[is_logged_in] URL path ({current_path}) contiene keyword de autenticación.")
                 return False
 
             # Condición 4: Debería haber una ruta más allá del simple dominio base (ej. /admin, /dashboard)
             # Esto es una heurística, podría ser demasiado estricto si la página post-login es el root.
             # Pero para la mayoría de las apps de admin, hay una ruta.
-            if not current_page_parsed.path or current_page_parsed.path == '/':
+            if not current_path or current_path == '/':
                  # A menos que la URL de login sea el dominio base (ej. "https://app.com/" y NO "https://app.com/login")
                  # Y la página post-login sea también el dominio base.
                  # En el caso de E-Socios, login_url tiene /superadmin/login, y post-login es /admin o similar, así que esto es útil.
-                 if self.login_url.replace(login_page_parsed.scheme + "://", "").replace(base_site_domain, "").strip("/") : # si login_url tiene path
+                 if self._login_has_path:
                     logging.debug(f"[is_logged_in] URL actual ({current_url}) es solo el dominio base, pero se esperaba una ruta.")
                     return False
 
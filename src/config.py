@@ -3,6 +3,7 @@ Configuración para el Revisor de Juntas de EVoting.
 """
 import os
 import logging
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
 # --- Configuración del Logger para este módulo ---
@@ -32,6 +33,9 @@ else:
 
 # --- Configuración de la Aplicación/EVoting ---
 EVOTING_BASE_URL = os.getenv("EVOTING_BASE_URL", "https://eholders-mgnt.evoting.com")
+# Formas derivadas de la URL base, calculadas una sola vez al importar
+EVOTING_BASE_URL_PARSED = urlparse(EVOTING_BASE_URL)
+EVOTING_BASE_URL_NETLOC = EVOTING_BASE_URL_PARSED.netloc
 EVOTING_USERNAME = os.getenv("EVOTING_USERNAME")
 EVOTING_PASSWORD = os.getenv("EVOTING_PASSWORD")
 
@@ -39,12 +43,25 @@ if not EVOTING_USERNAME or not EVOTING_PASSWORD:
      logger_cfg.warning("CFG WARN: EVOTING_USERNAME o EVOTING_PASSWORD no están configurados.")
 
 # --- Configuración de Selenium (HEADLESS_MODE) ---
-raw_headless_mode = os.getenv("HEADLESS_MODE", "False") # Default es "False" (string)
-HEADLESS_MODE = raw_headless_mode.lower() == "true"
+raw_headless_mode = os.getenv("HEADLESS_MODE", "True") # Default es "True" (string): sin UI es más rápido
+HEADLESS_MODE = raw_headless_mode.lower() in ("1", "true")
 
-logger_cfg.info(f"[CONFIG_LOAD] os.getenv('HEADLESS_MODE', 'False') devolvió: '{raw_headless_mode}'")
+logger_cfg.info(f"[CONFIG_LOAD] os.getenv('HEADLESS_MODE', 'True') devolvió: '{raw_headless_mode}'")
 logger_cfg.info(f"[CONFIG_LOAD] HEADLESS_MODE procesado como: {HEADLESS_MODE} (Tipo: {type(HEADLESS_MODE)})")
 
+# Capturas de pantalla en los caminos de error (costosas: bloquean la sesión del driver)
+DEBUG_SCREENSHOTS = os.getenv("DEBUG_SCREENSHOTS", "False").lower() in ("1", "true")
+# Incluir el traceback completo en los errores de cada paso del runner (desactivado por defecto)
+VERBOSE_ERRORS = os.getenv("VERBOSE_ERRORS", "False").lower() in ("1", "true")
+# Sesiones de Chrome en paralelo del runner de E-Socios (por defecto, hasta 8 según CPUs)
+_default_esocios_workers = min(8, os.cpu_count() or 1)
+raw_esocios_workers = os.getenv("ESOCIOS_WORKERS", str(_default_esocios_workers))
+try:
+    ESOCIOS_WORKERS = int(raw_esocios_workers)
+except ValueError:
+    logger_cfg.warning(f"CFG WARN: ESOCIOS_WORKERS='{raw_esocios_workers}' no es un entero. Se usa {_default_esocios_workers}.")
+    ESOCIOS_WORKERS = _default_esocios_workers
+
 IMPLICIT_WAIT = int(os.getenv("IMPLICIT_WAIT", "10"))
 PAGE_LOAD_TIMEOUT = int(os.getenv("PAGE_LOAD_TIMEOUT", "30"))
 POST_LOGIN_WAIT = int(os.getenv("POST_LOGIN_WAIT", "3"))
@@ -60,8 +77,10 @@ DATA_DIR = os.path.join(ROOT_DIR, "data")
 UPLOAD_FOLDER = os.path.join(DATA_DIR, "uploads")
 REPORTS_DIR = os.path.join(ROOT_DIR, "reports")
 
+# En arranques en caliente los directorios ya existen: se evita la llamada a makedirs
 for directory in [UPLOAD_FOLDER, REPORTS_DIR]:
-    os.makedirs(directory, exist_ok=True)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
 
 # --- Google Sheets ---
 SPREADSHEET_URL_OR_ID = os.getenv("SPREADSHEET_URL_OR_ID")
@@ -1,56 +1,732 @@
+import base64
+import csv
+import itertools
+import json
 import logging
 import os
+import queue
+import random
+import tempfile
+import threading
 import time
-# from dotenv import load_dotenv # ELIMINAR o comentar esta línea si existe
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 
 # Assuming these modules/classes exist and are correctly structured
 from src.webdriver_setup import setup_webdriver # Assuming this function is available
+from src.webdriver_pool import WebDriverPool
 from src.auth_manager import AuthManager
-from src.config import EVOTING_USERNAME, EVOTING_PASSWORD, HEADLESS_MODE # Antes IS_HEADLESS_FROM_CONFIG
-from src.google_sheets_client import read_sheet_data, update_cell_in_sheet # Import the new function
+from src.config import EVOTING_USERNAME, EVOTING_PASSWORD, HEADLESS_MODE, DEBUG_SCREENSHOTS, VERBOSE_ERRORS, ESOCIOS_WORKERS, ROOT_DIR, SPREADSHEET_URL_OR_ID, SHEET_NAME # Antes IS_HEADLESS_FROM_CONFIG
+from src.google_sheets_client import read_pending_rows, queue_cell_update, queue_row_update, flush_cell_updates, failed_cell_update_flushes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Load .env variables at the start of the script if they are needed here
-# load_dotenv() # Uncomment if esocios_runner.py also directly accesses .env variables beyond what webdriver_setup does
-
 ESOCIOS_BASE_URL = "https://esocios.evoting.com"
 ESOCIOS_LOGIN_URL = f"{ESOCIOS_BASE_URL}/superadmin/login"
 ESOCIOS_ORGANIZATIONS_URL = f"{ESOCIOS_BASE_URL}/superadmin/organizations" # Assuming this is the org page
 ESOCIOS_ADD_ORGANIZATION_URL = f"{ESOCIOS_BASE_URL}/superadmin/organizations/add" # Assuming this is the add org page
+# Página real del formulario "Crear nueva organización" (distinta de la de /superadmin)
+ESOCIOS_CREATE_ORG_URL = f"{ESOCIOS_BASE_URL}/admin/organizations/add"
+
+# Encabezados de columna del Google Sheet.
+# Asume que la columna D (índice 4) se llamará "Estado Final" en el Sheet
+# y la columna E (índice 5) se llamará "Estado Procesamiento"
+SLUG_COLUMN_HEADER = "Slug"
+ORG_NAME_COLUMN_HEADER = "Nombre Organización"
+PARENT_ORG_COLUMN_HEADER = "Organización padre"
+FINAL_STATUS_COLUMN_HEADER = "Estado Final"
+PROCESSING_STATUS_COLUMN_HEADER = "Estado Procesamiento"
+# Columnas que se leen de cada fila, en el orden en que se desempaquetan
+ROW_COLUMNS = [SLUG_COLUMN_HEADER, ORG_NAME_COLUMN_HEADER, PARENT_ORG_COLUMN_HEADER]
+
+# Índices de columna (1-indexed) para escribir en el Sheet
+STATUS_COLUMN_INDEX = 4  # Columna D para el estado final
+PROCESSING_STATUS_COLUMN_INDEX = 5 # Columna E para el estado de "en proceso"
+
+# Campos adicionales que se crean para los usuarios de cada organización
+ADDITIONAL_USER_FIELDS = [
+    {"name": "Apellido", "type": "texto"},
+    {"name": "Sexo", "type": "texto"},
+    {"name": "Región", "type": "texto"},
+    {"name": "Provincia", "type": "texto"},
+    {"name": "Comuna", "type": "texto"},
+    {"name": "RSU/RAF", "type": "numero"}
+]
+
+# Switches de funcionalidades de pago que deben quedar activos.
+# El switch "Envío de correos" está deshabilitado en el HTML de ejemplo (Mui-disabled);
+# si necesitara activarse y estuviera habilitado, se añadiría aquí.
+PAYMENT_FEATURE_SWITCHES = ["Descarga de usuarios", "Gráficos personalizados"]
+
+# Cada worker abre su propia sesión de Chrome; se limita para no saturar la máquina
+MAX_WORKERS = max(1, ESOCIOS_WORKERS)
+
+# Localizadores del formulario de creación. Se prefieren selectores CSS (querySelector
+# nativo) sobre XPath; XPath queda solo para coincidencias por texto.
+NAME_INPUT = (By.CSS_SELECTOR, "input#name")
+LOGO_INPUT = (By.CSS_SELECTOR, "input[type=file][name=logo]")
+LOGIN_IMG_INPUT = (By.CSS_SELECTOR, "input[type=file][name=loginImage]")
+AUTOCOMPLETE_LISTBOX = (By.CSS_SELECTOR, "ul[role=listbox]")
+# Botón "Agregar" del formulario que contiene input#name: la página de organizaciones tiene
+# su propio submit ("Buscar") que puede seguir montado mientras el SPA cambia de ruta
+SUBMIT_BTN = (
+    By.XPATH,
+    "//form[.//input[@id='name']]//button[@type='submit' and contains(normalize-space(), 'Agregar')]",
+)
+# Encabezado "Administración de..." que solo renderiza la página de organizaciones con sesión
+ORGANIZATIONS_HEADER = (By.XPATH, "//h1[contains(normalize-space(), 'Administración de')]")
+# Input de usuario del formulario de login, al que el SPA redirige si no hay sesión
+LOGIN_USERNAME_INPUT = (By.NAME, "username")
+# Input del autocompletado "Organización padre", ubicado vía su label en una sola búsqueda
+PARENT_ORG_INPUT = (
+    By.XPATH,
+    "//label[contains(text(),'Organización padre')]/ancestor::div[contains(@class, 'MuiGrid2-grid-sm-6')]"
+    "//div[contains(@class, 'MuiAutocomplete-root')]//input[@type='text']",
+)
+
+# Localizadores del camino alternativo (Selenium puro) para los campos adicionales.
+# Los inputs "Nombre del dato" no tienen atributo estable propio: se ubican vía su label.
+FIELD_NAME_INPUTS = (
+    By.XPATH,
+    "//label[contains(text(),'Nombre del dato') and .//span[contains(@class, 'MuiFormLabel-asterisk')]]"
+    "/following-sibling::div//input[@type='text']",
+)
+FIELD_TYPE_BUTTONS = {
+    "texto": (By.XPATH, "//button[contains(normalize-space(), 'Tipo texto')]"),
+    "numero": (By.XPATH, "//button[contains(normalize-space(), 'Tipo número')]"),
+}
+
+# Raíz del proyecto, resuelta una sola vez por proceso en src.config
+_PROJECT_ROOT = ROOT_DIR
+
+# Imágenes que se cargan en cada organización. Se resuelven una sola vez al importar;
+# None indica que el archivo no existe y la carga se omite.
+_LOGO_FILE = os.path.join(_PROJECT_ROOT, "logo-anef.png")
+_LOGIN_IMG_FILE = os.path.join(_PROJECT_ROOT, "Iniciosesion_esocios.png")
+LOGO_PATH = _LOGO_FILE if os.path.exists(_LOGO_FILE) else None
+LOGIN_IMG_PATH = _LOGIN_IMG_FILE if os.path.exists(_LOGIN_IMG_FILE) else None
+
+# Cookies de la última sesión válida de E-Socios (ignorado en git). Mientras el archivo
+# sea más reciente que SESSION_MAX_AGE_SECONDS se restauran en lugar de rellenar el login.
+SESSION_FILE = os.path.join(_PROJECT_ROOT, ".esocios_session.json")
+SESSION_MAX_AGE_SECONDS = 30 * 60
+
+# Registro local de resultados por fila (ignorado en git). Se escribe antes de encolar
+# la actualización del Sheet y se borra cuando todo quedó sincronizado; si una ejecución
+# se corta antes, la siguiente recupera de aquí los resultados en vez de reprocesar.
+RESULTS_LOG_FILE = os.path.join(_PROJECT_ROOT, ".esocios_results.csv")
+_results_log_lock = threading.Lock()
+
+# Serializa login/restauración: el primer worker inicia sesión y los demás reutilizan sus cookies
+_session_lock = threading.Lock()
+
+# Timeouts de las esperas explícitas reutilizadas dentro de cada paso
+SHORT_WAIT_TIMEOUT = 10
+LONG_WAIT_TIMEOUT = 20
+
+# Cadencia de sondeo de las esperas (el default de Selenium es 0.5s). El autocompletado
+# de MUI aplica debounce al input, así que ahí se sondea algo más espaciado.
+POLL_FREQUENCY = 0.1
+AUTOCOMPLETE_POLL_FREQUENCY = 0.15
+
+# Esperas largas en dos etapas: una primera corta con sondeo rápido, que es lo que tarda
+# la UI normalmente, y si vence, el resto del tiempo con sondeo espaciado para no cargar
+# a chromedriver con comandos mientras la app está lenta.
+FIRST_STAGE_TIMEOUT = 8
+SLOW_POLL_FREQUENCY = 0.5
+
+# Tiempo máximo para que la app redirija fuera de la página de login tras enviar credenciales
+LOGIN_REDIRECT_TIMEOUT = 15
+
+# Tiempo máximo para que el autocompletado de organización padre muestre la opción buscada
+AUTOCOMPLETE_TIMEOUT = 15
+
+# Miniaturas que la UI muestra tras cargar un archivo en un input[type=file]
+UPLOAD_PREVIEW_CSS = "img[src^='blob:'], img[src^='data:']"
+
+# Archivos a cargar en cada organización: (locator CSS del input, ruta o None, descripción)
+FILE_UPLOADS = [
+    (LOGO_INPUT, LOGO_PATH, f"logo ({_LOGO_FILE})"),
+    (LOGIN_IMG_INPUT, LOGIN_IMG_PATH, f"imagen de login ({_LOGIN_IMG_FILE})"),
+]
+
+# Devuelve el primer elemento de cada selector CSS (null si aún no existe)
+_QUERY_ALL_JS = "return arguments[0].map(selector => document.querySelector(selector));"
+
+
+# Las capturas se codifican en memoria y un único hilo daemon las escribe a disco,
+# para que los workers no se bloqueen (ni compitan) por I/O en los caminos de error.
+_screenshot_queue = queue.Queue()
+_screenshot_writer_lock = threading.Lock()
+_screenshot_writer_thread = None
+
+
+# Captura vía CDP en JPEG con optimizeForSpeed: bastante más rápida que el PNG de
+# get_screenshot_as_png y suficiente para diagnosticar el fallo.
+_CDP_SCREENSHOT_PARAMS = {"format": "jpeg", "quality": 60, "optimizeForSpeed": True}
+
+# Identificador de la ejecución, calculado una sola vez, y contador de capturas:
+# los nombres quedan ordenados por ejecución y por orden de captura.
+RUN_ID = f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}"
+_screenshot_counter = itertools.count(1)
+
+# Capturas de la fila en curso de cada worker. Se guardan en memoria y solo se escriben
+# si la fila termina fallando: los errores de los que se recupera (ej. el camino
+# alternativo de los campos adicionales) no generan archivos.
+ROW_SCREENSHOT_BUFFER_SIZE = 2
+_row_screenshots = threading.local()
+
+
+def _screenshot_writer() -> None:
+    """Decodifica y escribe a disco las capturas encoladas por _save_screenshot."""
+    while True:
+        filename, image_data = _screenshot_queue.get()
+        try:
+            if isinstance(image_data, str):
+                image_data = base64.b64decode(image_data)
+            with open(filename, 'wb') as file:
+                file.write(image_data)
+            logger.info(f"Screenshot guardado como {filename}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Error al guardar screenshot '{filename}': {e}")
+        finally:
+            _screenshot_queue.task_done()
+
+
+def _save_screenshot(driver: WebDriver, stage: str) -> None:
+    """Captura la pantalla en memoria y encola su escritura en segundo plano.
+
+    Solo captura si DEBUG_SCREENSHOTS está activo. El archivo se nombra
+    "{stage}_{RUN_ID}_{n}.jpg", único aunque varios workers fallen en el mismo
+    segundo. Durante una fila la captura queda retenida hasta saber si la fila falla.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        stage (str): Prefijo que identifica el paso que falló (ej. "error_submit_timeout_btn").
+    """
+    if not DEBUG_SCREENSHOTS:
+        return
+    filename = f"{stage}_{RUN_ID}_{next(_screenshot_counter)}.jpg"
+    try:
+        # El base64 se decodifica en el hilo escritor, fuera del worker
+        image_data = driver.execute_cdp_cmd("Page.captureScreenshot", _CDP_SCREENSHOT_PARAMS)["data"]
+    except Exception as e_cdp:
+        logger.debug(f"Captura CDP no disponible ({e_cdp}). Usando get_screenshot_as_png.")
+        filename = f"{filename[:-4]}.png"
+        try:
+            image_data = driver.get_screenshot_as_png()
+        except Exception as e:
+            logger.error(f"Error al capturar screenshot '{filename}': {e}")
+            return
+    buffer = getattr(_row_screenshots, "buffer", None)
+    if buffer is not None:
+        buffer.append((filename, image_data))
+    else:
+        _enqueue_screenshot(filename, image_data)
+
+
+def _enqueue_screenshot(filename: str, image_data) -> None:
+    """Encola una captura para el hilo escritor, arrancándolo la primera vez."""
+    global _screenshot_writer_thread
+    with _screenshot_writer_lock:
+        if _screenshot_writer_thread is None:
+            _screenshot_writer_thread = threading.Thread(
+                target=_screenshot_writer, name="screenshot-writer", daemon=True
+            )
+            _screenshot_writer_thread.start()
+    _screenshot_queue.put((filename, image_data))
+
+
+def _begin_row_screenshots() -> None:
+    """Empieza a retener en memoria las capturas de la fila que procesa este hilo."""
+    _row_screenshots.buffer = deque(maxlen=ROW_SCREENSHOT_BUFFER_SIZE)
+
+
+def _end_row_screenshots(persist: bool) -> None:
+    """Termina la fila en curso: escribe sus últimas capturas si falló y descarta el resto.
+
+    Args:
+        persist (bool): True si la fila falló y sus capturas deben guardarse a disco.
+    """
+    buffer = getattr(_row_screenshots, "buffer", None)
+    _row_screenshots.buffer = None
+    if persist and buffer:
+        for filename, image_data in buffer:
+            _enqueue_screenshot(filename, image_data)
+
+
+def flush_screenshots() -> None:
+    """Bloquea hasta que todas las capturas encoladas se hayan escrito a disco."""
+    _screenshot_queue.join()
+
+
+# Invariante: los drivers del runner usan implicitly_wait(0) y todas las esperas son
+# explícitas vía _wait. Con una espera implícita > 0 cada find_element fallido dentro de
+# un WebDriverWait.until bloquearía ese tiempo extra antes de volver a sondear.
+def _wait(driver: WebDriver, timeout: float, poll_frequency: float = POLL_FREQUENCY) -> WebDriverWait:
+    """Crea una espera explícita que sondea rápido e ignora elementos obsoletos o ausentes.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium (o un WebElement como contexto).
+        timeout (float): Tiempo máximo de espera en segundos.
+        poll_frequency (float, optional): Intervalo entre sondeos. Defaults to POLL_FREQUENCY.
+
+    Returns:
+        WebDriverWait: Espera configurada.
+    """
+    return WebDriverWait(
+        driver,
+        timeout,
+        poll_frequency=poll_frequency,
+        ignored_exceptions=(StaleElementReferenceException, NoSuchElementException),
+    )
+
+
+def _wait_for_js_condition(driver: WebDriver, wait_script: str, timeout: float):
+    """Espera con un MutationObserver en el navegador, en un solo comando de WebDriver.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        wait_script (str): _WAIT_FOR_CONDITION_JS_TEMPLATE con el predicado ya insertado.
+        timeout (float): Tiempo máximo en segundos (debe ser menor que SCRIPT_TIMEOUT).
+
+    Returns:
+        El valor verdadero devuelto por el predicado.
+
+    Raises:
+        TimeoutException: Si el predicado no se cumplió en el tiempo indicado.
+    """
+    result = driver.execute_async_script(wait_script, int(timeout * 1000))
+    if not result:
+        raise TimeoutException(f"La condición no se cumplió en {timeout}s")
+    return result
+
+
+def _wait_two_stage(driver: WebDriver, condition, step: str, timeout: float = LONG_WAIT_TIMEOUT):
+    """Espera una condición en dos etapas (ver FIRST_STAGE_TIMEOUT).
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        condition (callable): Condición para WebDriverWait.until.
+        step (str): Descripción del paso, para el log si la primera etapa vence.
+        timeout (float, optional): Tiempo máximo total en segundos. Defaults to LONG_WAIT_TIMEOUT.
+
+    Returns:
+        El valor devuelto por la condición.
+
+    Raises:
+        TimeoutException: Si la condición no se cumple en el tiempo total.
+    """
+    first_timeout = min(FIRST_STAGE_TIMEOUT, timeout)
+    try:
+        return _wait(driver, first_timeout).until(condition)
+    except TimeoutException:
+        if timeout <= first_timeout:
+            raise
+        logger.warning(f"{step}: sin respuesta tras {first_timeout}s. Esperando hasta {timeout}s...")
+        return _wait(driver, timeout - first_timeout, poll_frequency=SLOW_POLL_FREQUENCY).until(condition)
+
+
+def _retry(fn, step: str, tries: int = 3, base: float = 0.25, cap: float = 4.0, retry_on=(StaleElementReferenceException,)):
+    """Ejecuta fn reintentando con backoff exponencial y jitter ante errores transitorios.
+
+    Args:
+        fn (callable): Función sin argumentos a ejecutar.
+        step (str): Descripción del paso, para el log de cada reintento.
+        tries (int, optional): Intentos totales. Defaults to 3.
+        base (float, optional): Espera base en segundos. Defaults to 0.25.
+        cap (float, optional): Espera máxima entre intentos en segundos. Defaults to 4.0.
+        retry_on (tuple, optional): Excepciones que provocan un reintento.
+            Defaults to (StaleElementReferenceException,).
+
+    Returns:
+        El valor devuelto por fn.
+
+    Raises:
+        La última excepción de retry_on si se agotan los intentos.
+    """
+    for attempt in range(tries):
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt == tries - 1:
+                raise
+            delay = random.uniform(0, min(cap, base * 2 ** attempt))
+            logger.debug(f"{step}: {type(e).__name__}, reintento {attempt + 1}/{tries - 1} en {delay:.2f}s")
+            time.sleep(delay)
+
+
+# Script que rellena el nombre, activa switches y añade campos adicionales en una sola
+# ejecución dentro del navegador (ver src/js/configure_form.js para el formato).
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "js", "configure_form.js"), encoding="utf-8") as _js_file:
+    _CONFIGURE_FORM_JS = _js_file.read()
+
+# Límite para execute_async_script: cubre la espera por cada campo adicional del script
+SCRIPT_TIMEOUT = 60
+
+
+# Devuelve el <li> del desplegable de MUI Autocomplete cuyo texto empieza por el término
+# buscado, o null mientras el listbox siga cargando (aria-busy) o no haya coincidencias.
+_FIND_AUTOCOMPLETE_OPTION_JS = """
+return (function(term) {
+    const listboxes = [...document.querySelectorAll('ul[role=listbox]')];
+    if (!listboxes.length || listboxes.some(l => l.getAttribute('aria-busy') === 'true')) {
+        return null;
+    }
+    const needle = term.toLowerCase();
+    return [...document.querySelectorAll('ul[role=listbox] li')]
+        .find(li => li.textContent.trim().toLowerCase().startsWith(needle)) || null;
+})(arguments[0]);
+"""
+
+# Activa el switch "Mostrar al usuario" del campo adicional al que pertenece el input
+# (el contenedor más cercano que lo incluya). Devuelve el estado final del checkbox, o
+# null si no se encontró el switch.
+_ENABLE_SHOW_USER_SWITCH_JS = """
+const findLabel = root => [...root.querySelectorAll('.MuiFormControlLabel-root')]
+    .find(label => label.innerText.includes('Mostrar al usuario')) || null;
+let container = arguments[0].parentElement;
+while (container && !findLabel(container)) {
+    container = container.parentElement;
+}
+const label = container && findLabel(container);
+const checkbox = label && label.querySelector('input[type=checkbox]');
+if (!checkbox) {
+    return null;
+}
+if (!checkbox.checked) {
+    label.click();
+}
+return checkbox.checked;
+"""
+
+# Cuenta los inputs "Nombre del dato" existentes y hace scroll + clic en el botón de tipo
+# de campo, ambos por XPath. Devuelve {count} con la cantidad previa al clic, o null si el
+# botón aún no existe (sin hacer clic), para poder sondearlo con una espera.
+_CLICK_FIELD_TYPE_BUTTON_JS = """
+const [buttonXpath, inputsXpath] = arguments;
+const button = document.evaluate(buttonXpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (!button) {
+    return null;
+}
+const count = document.evaluate(inputsXpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;
+button.scrollIntoView({block: 'center'});
+button.click();
+return {count: count};
+"""
+
+# Escribe el término en un input controlado por React en un solo comando: React ignora
+# asignaciones directas a .value, así que se usa el setter nativo y se emite 'input'.
+_SET_REACT_INPUT_VALUE_JS = """
+const input = arguments[0];
+const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+input.focus();
+setter.call(input, arguments[1]);
+input.dispatchEvent(new Event('input', {bubbles: true}));
+return input.value === arguments[1];
+"""
+
+
+# Verifica en un solo round-trip que el navegador terminó la navegación a la URL
+# indicada (DOMContentLoaded) y que React ya pintó el encabezado del formulario.
+_CREATE_PAGE_READY_JS = """
+return location.href === arguments[0]
+    && document.readyState !== 'loading'
+    && [...document.querySelectorAll('h4')].some(h => h.textContent.includes('Crear nueva organización'));
+"""
+
+# Formulario de creación recién cargado: nombre vacío y sin campos adicionales añadidos
+_CREATE_PAGE_PRISTINE_JS = """
+const nameInput = document.getElementById('name');
+return location.href === arguments[0]
+    && document.readyState !== 'loading'
+    && !!nameInput && nameInput.value === ''
+    && ![...document.querySelectorAll('label')].some(l => l.textContent.includes('Nombre del dato'));
+"""
+
+# Resultado del envío del formulario en un solo sondeo: "redirect" si la app volvió a
+# /admin/organizations (sin /add), el texto de una alerta de éxito visible, o null.
+_SUBMIT_OUTCOME_JS = """
+const path = location.pathname;
+if (path.includes('/admin/organizations') && !path.includes('/add')) {
+    return 'redirect';
+}
+const successTexts = ['Organización creada', 'éxito', 'correctamente'];
+const alert = [...document.querySelectorAll('.MuiAlert-filledSuccess, [role=alert]')]
+    .find(el => el.offsetParent !== null && successTexts.some(t => el.textContent.includes(t)));
+return alert ? 'message:' + alert.textContent.trim() : null;
+"""
+
+# Tiempo máximo para detectar la redirección o el mensaje de éxito tras enviar
+SUBMIT_CONFIRMATION_TIMEOUT = 20
+
+# Espera dentro del navegador a que un predicado JS (cuerpo de función con return) sea
+# verdadero: se reevalúa ante cada mutación del DOM y, como respaldo para cambios de URL
+# vía pushState, cada 250ms. Argumentos: timeout en ms. Devuelve el valor o null.
+_WAIT_FOR_CONDITION_JS_TEMPLATE = """
+const done = arguments[arguments.length - 1];
+const timeoutMs = arguments[0];
+const check = function () { /*PREDICATE*/ };
+let finished = false, observer = null, interval = null, timer = null;
+function finish(value) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    clearInterval(interval);
+    clearTimeout(timer);
+    done(value);
+}
+function evaluate() {
+    try {
+        const value = check();
+        if (value) {
+            finish(value);
+        }
+    } catch (e) {
+        // el DOM puede estar a medio renderizar: se reintenta en la próxima mutación
+    }
+}
+evaluate();
+if (!finished) {
+    observer = new MutationObserver(evaluate);
+    observer.observe(document.documentElement, {subtree: true, childList: true, attributes: true, characterData: true});
+    interval = setInterval(evaluate, 250);
+    timer = setTimeout(() => finish(null), timeoutMs);
+}
+"""
+_SUBMIT_OUTCOME_WAIT_JS = _WAIT_FOR_CONDITION_JS_TEMPLATE.replace("/*PREDICATE*/", _SUBMIT_OUTCOME_JS)
+
+# Navegación del lado del cliente (router del SPA) sin recargar el bundle
+_SPA_NAVIGATE_JS = """
+window.history.pushState({}, '', arguments[0]);
+window.dispatchEvent(new PopStateEvent('popstate'));
+"""
+
+# Tiempo máximo para que el router del SPA pinte la página antes de recargarla completa
+SPA_NAVIGATION_TIMEOUT = 3
+
+
+def _configure_form(driver: WebDriver, org_name: str = None, switch_labels=(), fields=()) -> dict:
+    """Aplica nombre, switches y campos adicionales con un solo execute_async_script.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        org_name (str, optional): Nombre a escribir en el input #name. Defaults to None.
+        switch_labels (iterable, optional): Textos de los switches a activar. Defaults to ().
+        fields (iterable, optional): Campos adicionales {"name", "type", "show"} a añadir. Defaults to ().
+
+    Returns:
+        dict: {"name": bool | None, "switches": [bool | None, ...],
+               "fields": [{"name", "ok", "error"}, ...]}; None indica que el elemento
+              no se encontró (o que no se pidió el nombre). Los campos se detienen
+              en el primero que falla.
+    """
+    config = {"orgName": org_name, "switches": list(switch_labels), "fields": list(fields)}
+    return driver.execute_async_script(_CONFIGURE_FORM_JS, config)
+
+
+def _fast_fill(driver: WebDriver, input_element, text: str) -> None:
+    """Reemplaza el texto de un input controlado por React en dos comandos.
+
+    Vacía el input (y le da el foco) con el setter nativo y luego inserta el texto de una
+    vez con CDP Input.insertText, en lugar de clear() + send_keys() tecla por tecla.
+    Si CDP no está disponible se recurre a send_keys.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        input_element: WebElement del input a rellenar.
+        text (str): Texto a escribir.
+    """
+    driver.execute_script(_SET_REACT_INPUT_VALUE_JS, input_element, "")
+    try:
+        driver.execute_cdp_cmd("Input.insertText", {"text": text})
+    except WebDriverException as e:
+        logger.debug(f"Input.insertText no disponible ({e}). Usando send_keys.")
+        input_element.send_keys(text)
+
+
+def _upload_files(driver: WebDriver, uploads: list) -> None:
+    """Carga archivos en inputs[type=file] y espera a que la UI muestre sus miniaturas.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        uploads (list): Pares (WebElement del input de archivo, ruta absoluta del archivo).
+    """
+    previews_before = len(driver.find_elements(By.CSS_SELECTOR, UPLOAD_PREVIEW_CSS))
+    for input_element, file_path in uploads:
+        input_element.send_keys(file_path)
+    try:
+        _wait(driver, 3).until(
+            lambda d: len(d.find_elements(By.CSS_SELECTOR, UPLOAD_PREVIEW_CSS)) >= previews_before + len(uploads)
+        )
+    except TimeoutException:
+        names = [os.path.basename(file_path) for _, file_path in uploads]
+        logger.warning(f"No se detectaron todas las miniaturas de {names} tras la carga. Continuando...")
+
+
+def _save_session(driver: WebDriver) -> None:
+    """Guarda las cookies de la sesión actual en SESSION_FILE.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium con sesión iniciada.
+    """
+    try:
+        tmp_path = f"{SESSION_FILE}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(driver.get_cookies(), file)
+        os.replace(tmp_path, SESSION_FILE)
+        logger.info(f"Sesión de E-Socios guardada en {SESSION_FILE}")
+    except Exception as e:
+        logger.warning(f"No se pudo guardar la sesión de E-Socios: {e}")
+
+
+def _restore_session(driver: WebDriver, auth_manager: AuthManager) -> bool:
+    """Intenta reutilizar las cookies guardadas para saltarse el formulario de login.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        auth_manager: AuthManager asociado al driver, usado para verificar la sesión.
+
+    Returns:
+        bool: True si la sesión restaurada está activa, False en caso contrario.
+    """
+    try:
+        if time.time() - os.path.getmtime(SESSION_FILE) > SESSION_MAX_AGE_SECONDS:
+            logger.info("Sesión guardada de E-Socios expirada. Se hará login completo.")
+            return False
+        with open(SESSION_FILE, 'r', encoding='utf-8') as file:
+            cookies = json.load(file)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        logger.warning(f"No se pudo leer la sesión guardada de E-Socios: {e}")
+        return False
+
+    try:
+        # Las cookies solo pueden añadirse estando en el dominio correspondiente
+        driver.get(ESOCIOS_BASE_URL)
+        for cookie in cookies:
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                logger.debug(f"Cookie '{cookie.get('name')}' no restaurada: {e}")
+        driver.get(ESOCIOS_ORGANIZATIONS_URL)
+        if _organizations_page_shows_session(driver, auth_manager):
+            logger.info("Sesión de E-Socios restaurada desde cookies guardadas.")
+            return True
+    except Exception as e:
+        logger.warning(f"Error restaurando la sesión de E-Socios: {e}")
+    logger.info("La sesión guardada de E-Socios ya no es válida. Se hará login completo.")
+    return False
+
+
+def _organizations_page_shows_session(driver: WebDriver, auth_manager: AuthManager) -> bool:
+    """Tras abrir ESOCIOS_ORGANIZATIONS_URL, decide si la sesión está activa.
+
+    Con page_load_strategy 'eager' driver.get vuelve en DOMContentLoaded, antes de que
+    el SPA redirija al login, así que la URL sola no basta: se espera a que aparezca el
+    encabezado de la página de organizaciones o el formulario de login.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        auth_manager: AuthManager asociado al driver, usado para verificar la URL.
+
+    Returns:
+        bool: True si se renderizó la página de organizaciones, False si apareció el login
+            o ninguna de las dos en LOGIN_REDIRECT_TIMEOUT segundos.
+    """
+    try:
+        _wait_two_stage(
+            driver,
+            EC.any_of(EC.presence_of_element_located(ORGANIZATIONS_HEADER),
+                      EC.presence_of_element_located(LOGIN_USERNAME_INPUT)),
+            "Página de organizaciones o login",
+            LOGIN_REDIRECT_TIMEOUT,
+        )
+    except TimeoutException:
+        logger.warning("No apareció la página de organizaciones ni el formulario de login.")
+        return False
+    return bool(driver.find_elements(*ORGANIZATIONS_HEADER)) and auth_manager.is_logged_in()
+
+
+def _profile_session_active(driver: WebDriver, auth_manager: AuthManager) -> bool:
+    """Comprueba si el perfil persistente de Chrome ya conserva una sesión válida.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        auth_manager: AuthManager asociado al driver, usado para verificar la sesión.
+
+    Returns:
+        bool: True si el driver ya está autenticado en E-Socios, False en caso contrario.
+    """
+    try:
+        driver.get(ESOCIOS_ORGANIZATIONS_URL)
+        if _organizations_page_shows_session(driver, auth_manager):
+            logger.info("Sesión de E-Socios activa en el perfil de Chrome. Se omite el login.")
+            return True
+    except Exception as e:
+        logger.warning(f"Error comprobando la sesión del perfil de Chrome: {e}")
+    return False
 
 
 def login_to_esocios(driver: WebDriver) -> bool:
     """Realiza el login en la plataforma E-Socios Superadmin.
 
+    Primero comprueba si el perfil de Chrome del worker (que persiste entre
+    ejecuciones) sigue autenticado; si no, reutiliza las cookies de SESSION_FILE si
+    siguen vigentes y, como último recurso, completa el formulario y guarda la
+    nueva sesión para los siguientes workers o ejecuciones.
+
     Args:
         driver: Instancia del WebDriver de Selenium.
 
     Returns:
         bool: True si el login fue exitoso, False en caso contrario.
     """
-    logger.info(f"Intentando login en E-Socios: {ESOCIOS_LOGIN_URL}")
     auth_manager = AuthManager(driver, login_url=ESOCIOS_LOGIN_URL)
-    
+    if _profile_session_active(driver, auth_manager):
+        return True
+    with _session_lock:
+        if _restore_session(driver, auth_manager):
+            return True
+        logger.info(f"Intentando login en E-Socios: {ESOCIOS_LOGIN_URL}")
+        if _login_with_form(driver, auth_manager):
+            _save_session(driver)
+            return True
+        return False
+
+
+def _login_with_form(driver: WebDriver, auth_manager: AuthManager) -> bool:
+    """Completa el formulario de login de E-Socios y verifica la sesión resultante.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        auth_manager: AuthManager configurado con la URL de login de E-Socios.
+
+    Returns:
+        bool: True si el login fue exitoso, False en caso contrario.
+    """
     try:
         if auth_manager.login(EVOTING_USERNAME, EVOTING_PASSWORD):
             logger.info("Login en E-Socios exitoso.")
-            # Verificación adicional: después del login, la URL debería cambiar.
-            # Podríamos esperar a que la URL sea diferente de la página de login
-            # o que contenga una parte específica del dashboard/admin.
-            # Por ejemplo, esperar a estar en ESOCIOS_ORGANIZATIONS_URL o similar.
-            # Esto dependerá de la redirección exacta post-login.
-            # Ejemplo simple:
-            time.sleep(3) # Espera breve para redirección
+            # Verificación adicional: después del login, la URL debería dejar de ser la de login.
+            # Se espera la redirección en lugar de una pausa fija.
+            try:
+                _wait(driver, LOGIN_REDIRECT_TIMEOUT).until(lambda d: ESOCIOS_LOGIN_URL not in d.current_url)
+            except TimeoutException:
+                pass
             current_url = driver.current_url
             if ESOCIOS_LOGIN_URL in current_url:
                 logger.warning(f"Login pareció exitoso, pero seguimos en la URL de login: {current_url}")
@@ -71,33 +747,53 @@ def login_to_esocios(driver: WebDriver) -> bool:
             logger.error("Login en E-Socios falló según AuthManager.")
             return False
     except Exception as e:
-        logger.error(f"Excepción durante el login en E-Socios: {e}", exc_info=True)
+        logger.error(f"Excepción durante el login en E-Socios: {e}", exc_info=VERBOSE_ERRORS)
         return False
 
-def navigate_to_create_organization_page(driver: WebDriver) -> bool:
+def navigate_to_create_organization_page(driver: WebDriver, force_reload: bool = False) -> bool:
     """Navega directamente a la página de creación de organizaciones después del login.
 
+    Si la app ya está cargada intenta primero una navegación del router del SPA
+    (history.pushState) y, si el formulario no aparece, recarga la página completa.
+
     Args:
         driver: Instancia del WebDriver de Selenium.
+        force_reload (bool, optional): Omite la navegación SPA y recarga la página completa
+            (tras un fallo la app puede haber quedado en un estado inconsistente). Defaults to False.
 
     Returns:
         bool: True si la navegación es exitosa, False en caso contrario.
     """
-    # URL directa proporcionada por el usuario para la página de creación
-    target_add_url = "https://esocios.evoting.com/admin/organizations/add" 
-    # Nota: Esto es diferente del ESOCIOS_ADD_ORGANIZATION_URL global que era /superadmin/...
-    
+    target_add_url = ESOCIOS_CREATE_ORG_URL
+
     try:
+        # Con el driver reutilizado entre filas, la app ya está cargada: se intenta
+        # navegar con el router del SPA. Si ya estamos en /add solo se recarga
+        # cuando el formulario no está limpio.
+        current_url = driver.current_url
+        if not force_reload and current_url == target_add_url and driver.execute_script(_CREATE_PAGE_PRISTINE_JS, target_add_url):
+            logger.info("Ya en la página de creación con el formulario vacío. Se omite la navegación.")
+            return True
+        if not force_reload and current_url.startswith(ESOCIOS_BASE_URL) and not current_url.startswith(target_add_url):
+            driver.execute_script(_SPA_NAVIGATE_JS, target_add_url)
+            try:
+                _wait(driver, SPA_NAVIGATION_TIMEOUT).until(
+                    lambda d: d.execute_script(_CREATE_PAGE_READY_JS, target_add_url)
+                )
+                logger.info(f"Navegación SPA a la página de creación de organización exitosa: {target_add_url}")
+                return True
+            except TimeoutException:
+                logger.info("La navegación SPA no mostró el formulario. Recargando la página completa...")
+
         logger.info(f"Navegando directamente a la página de creación de organización: {target_add_url}")
+        # Con page_load_strategy 'eager', driver.get ya bloquea hasta el evento
+        # DOMContentLoaded del navegador; normalmente el primer sondeo basta.
         driver.get(target_add_url)
 
-        # Esperar a que la URL sea la correcta y que un elemento clave de la página esté presente.
-        logger.info(f"Esperando que la URL sea: {target_add_url} (Timeout de 20s)")
-        WebDriverWait(driver, 20).until(EC.url_to_be(target_add_url))
-        
-        logger.info(f"URL correcta ({driver.current_url}) alcanzada. Verificando título del encabezado...")
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, "//h4[contains(text(),'Crear nueva organización')]"))
+        # URL, estado del documento y encabezado se comprueban juntos en una sola condición
+        logger.info(f"Esperando la página de creación en {target_add_url} (Timeout de {LONG_WAIT_TIMEOUT}s)")
+        _wait_two_stage(
+            driver, lambda d: d.execute_script(_CREATE_PAGE_READY_JS, target_add_url), "Página de creación"
         )
         logger.info(f"Navegación directa a la página de creación de organización exitosa: {driver.current_url}")
         return True
@@ -113,24 +809,12 @@ def navigate_to_create_organization_page(driver: WebDriver) -> bool:
             f"Timeout esperando la página de creación en '{target_add_url}'. " \
             f"URL actual en el momento del timeout: '{current_url_at_timeout}'."
         )
-        timestamp = time.strftime("%Y%m%d-%H%M%S")
-        screenshot_filename = f"error_direct_nav_create_org_{timestamp}.png"
-        try:
-            driver.save_screenshot(screenshot_filename)
-            logger.info(f"Screenshot guardado como {screenshot_filename}")
-        except Exception as e_screenshot:
-            logger.error(f"Error al guardar screenshot '{screenshot_filename}': {e_screenshot}")
+        _save_screenshot(driver, "error_direct_nav_create_org")
         return False
     
     except Exception as e:
-        logger.error(f"Error inesperado al navegar directamente a la página de creación de organización: {e}", exc_info=True)
-        timestamp = time.strftime("%Y%m%d-%H%M%S")
-        screenshot_filename = f"error_direct_nav_unexpected_{timestamp}.png"
-        try:
-            driver.save_screenshot(screenshot_filename)
-            logger.info(f"Screenshot guardado como {screenshot_filename}")
-        except Exception as e_screenshot:
-            logger.error(f"Error al guardar screenshot '{screenshot_filename}': {e_screenshot}")
+        logger.error(f"Error inesperado al navegar directamente a la página de creación de organización: {e}", exc_info=VERBOSE_ERRORS)
+        _save_screenshot(driver, "error_direct_nav_unexpected")
         return False
 
 def fill_organization_details(driver: WebDriver, org_name: str, parent_org_name: str = None) -> bool:
@@ -144,111 +828,65 @@ def fill_organization_details(driver: WebDriver, org_name: str, parent_org_name:
     Returns:
         bool: True si los detalles se rellenaron exitosamente, False en caso contrario.
     """
+    short_wait = _wait(driver, SHORT_WAIT_TIMEOUT)
     try:
         logger.info(f"Rellenando Nombre de la organización: {org_name}")
-        name_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "name"))
-        )
-        name_input.clear()
-        name_input.send_keys(org_name)
+        short_wait.until(EC.presence_of_element_located(NAME_INPUT))
+        if not _configure_form(driver, org_name=org_name)["name"]:
+            logger.error(f"No se pudo establecer el nombre de la organización '{org_name}'.")
+            return False
 
         if parent_org_name:
             # Extraer solo el nombre base para la búsqueda si viene con ID
             search_term = parent_org_name.split('[')[0].strip()
             logger.info(f"Rellenando Organización padre: buscando '{search_term}' (original: '{parent_org_name}')")
-            
-            parent_org_section_xpath = "//label[contains(text(),'Organización padre')]/ancestor::div[contains(@class, 'MuiGrid2-grid-sm-6')]"
-            parent_org_section = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, parent_org_section_xpath))
-            )
-
-            autocomplete_input_xpath = ".//div[contains(@class, 'MuiAutocomplete-root')]//input[@type='text']"
-            autocomplete_input = parent_org_section.find_element(By.XPATH, autocomplete_input_xpath)
-            
-            first_option_xpath = "//ul[@role='listbox']/li[1]"
-            max_retries = 3 # Podríamos aumentar esto si es necesario con la nueva técnica
-            selected_parent = False
-
-            for attempt in range(max_retries):
-                logger.info(f"Intento {attempt + 1}/{max_retries} para seleccionar Organización Padre '{search_term}'...")
-                autocomplete_input.clear()
-                autocomplete_input.send_keys(search_term)
-                time.sleep(1.0) # Pausa inicial después de escribir el término completo
-
-                # Técnica de borrar y re-escribir último carácter (a partir del segundo intento)
-                if attempt > 0 and len(search_term) > 0: # Solo si hay algo que borrar y no es el primer intento
-                    logger.info(f"Aplicando técnica de re-escritura para '{search_term}' en intento {attempt + 1}.")
-                    # Borrar el último carácter
-                    autocomplete_input.send_keys(Keys.BACK_SPACE)
-                    time.sleep(0.5) # Pausa breve
-                    # Re-escribir el último carácter
-                    autocomplete_input.send_keys(search_term[-1])
-                    time.sleep(1.0) # Pausa después de re-escribir
-                else:
-                    # En el primer intento, ya se escribió y se hizo una pausa, ahora esperamos un poco más.
-                    time.sleep(1.0) # Pausa adicional en el primer intento (total 2s después de send_keys inicial)
 
-                try:
-                    # Aumentamos la espera individual para la opción, ya que las pausas son más explícitas
-                    parent_option = WebDriverWait(driver, 15).until( 
-                        EC.element_to_be_clickable((By.XPATH, first_option_xpath))
-                    )
-                    option_text = parent_option.text
-                    logger.info(f"Opción encontrada en desplegable: '{option_text}'. Haciendo clic...")
-                    parent_option.click()
-                    time.sleep(0.7)
-                    selected_parent = True
-                    logger.info(f"Organización padre '{search_term}' seleccionada exitosamente en intento {attempt + 1}.")
-                    break
-                except TimeoutException:
-                    logger.warning(f"Intento {attempt + 1}: No se encontró opción para '{search_term}' después de las pausas y/o re-escritura.")
-                    if attempt < max_retries - 1:
-                        logger.info("Reintentando...")
-                        # No es necesario un time.sleep(1) aquí ya que el bucle tiene pausas al inicio
-                    else:
-                        logger.error(f"No se pudo seleccionar la organización padre '{search_term}' después de {max_retries} intentos.")
-                        driver.save_screenshot(f"error_fill_parent_org_no_options_{time.strftime('%Y%m%d-%H%M%S')}.png")
-                        return False
-            
-            if not selected_parent:
-                logger.error(f"Fallo final al seleccionar la organización padre '{search_term}'.")
+            autocomplete_input = short_wait.until(EC.presence_of_element_located(PARENT_ORG_INPUT))
+            if not driver.execute_script(_SET_REACT_INPUT_VALUE_JS, autocomplete_input, search_term):
+                # Camino alternativo si el input no aceptó el valor por el setter
+                _fast_fill(driver, autocomplete_input, search_term)
+
+            def select_matching_option(d):
+                """Hace clic en la opción cuyo texto empieza por el término, una vez terminada la búsqueda."""
+                option = d.execute_script(_FIND_AUTOCOMPLETE_OPTION_JS, search_term)
+                if option is None or not option.is_displayed():
+                    return False
+                option_text = option.text
+                option.click()
+                return option_text or True
+
+            try:
+                # MUI aplica debounce al input: se espera a que el listbox termine de cargar
+                option_text = _wait(
+                    driver, AUTOCOMPLETE_TIMEOUT, poll_frequency=AUTOCOMPLETE_POLL_FREQUENCY
+                ).until(select_matching_option)
+            except TimeoutException:
+                logger.error(f"No se encontró la organización padre '{search_term}' en el desplegable después de {AUTOCOMPLETE_TIMEOUT}s.")
+                _save_screenshot(driver, "error_fill_parent_org_no_options")
                 return False
+            logger.info(f"Opción '{option_text}' seleccionada en el desplegable.")
+            try:
+                _wait(driver, 5).until(EC.invisibility_of_element_located(AUTOCOMPLETE_LISTBOX))
+            except TimeoutException:
+                logger.warning("El desplegable de Organización padre sigue visible tras seleccionar la opción.")
+            logger.info(f"Organización padre '{search_term}' seleccionada exitosamente.")
 
         # --- Carga de Archivos ---
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) 
-        logo_file_path = os.path.join(project_root, "logo-anef.png")
-        login_image_path = os.path.join(project_root, "Iniciosesion_esocios.png")
-
-        # Logo de la organización
-        # El input real está oculto. El HTML muestra un label con id=":rg:" que es un botón.
-        # El input es name="logo" y accept=".png"
-        logger.info(f"Intentando cargar Logo de la organización: {logo_file_path}")
-        if os.path.exists(logo_file_path):
-            # Encontrar el input[type="file"] asociado. Suele estar cerca del botón visible.
-            # XPath para el input oculto basado en el name="logo"
-            logo_input_xpath = "//input[@type='file' and @name='logo']"
-            logo_input_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, logo_input_xpath))
-            )
-            logo_input_element.send_keys(logo_file_path)
-            logger.info("Logo de la organización cargado.")
-            time.sleep(1) # Espera para que la UI procese la carga
-        else:
-            logger.warning(f"Archivo de logo no encontrado en {logo_file_path}. Saltando carga.")
-
-        # Imagen para el inicio de sesión de usuario
-        # Similar al logo, el input está oculto. name="loginImage"
-        logger.info(f"Intentando cargar Imagen para el inicio de sesión: {login_image_path}")
-        if os.path.exists(login_image_path):
-            login_image_input_xpath = "//input[@type='file' and @name='loginImage']"
-            login_image_input_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, login_image_input_xpath))
-            )
-            login_image_input_element.send_keys(login_image_path)
-            logger.info("Imagen para el inicio de sesión cargada.")
-            time.sleep(1) # Espera para que la UI procese la carga
-        else:
-            logger.warning(f"Archivo de imagen de login no encontrado en {login_image_path}. Saltando carga.")
+        # Los inputs reales (name="logo" y name="loginImage") están ocultos tras labels
+        # que actúan de botón; se esperan juntos y se cargan con una sola espera de miniaturas.
+        uploads = [(locator, path) for locator, path, _ in FILE_UPLOADS if path]
+        for _, path, description in FILE_UPLOADS:
+            if not path:
+                logger.warning(f"Archivo de {description} no encontrado. Saltando carga.")
+        if uploads:
+            def upload_inputs(d):
+                """Devuelve los inputs de archivo, en el orden de uploads, cuando existen todos."""
+                found = d.execute_script(_QUERY_ALL_JS, [locator[1] for locator, _ in uploads])
+                return found if all(found) else False
+
+            input_elements = short_wait.until(upload_inputs)
+            _upload_files(driver, [(element, path) for element, (_, path) in zip(input_elements, uploads)])
+            logger.info(f"Archivos cargados: {[os.path.basename(path) for _, path in uploads]}")
 
         # TODO: Añadir lógica para Tipo de identificación (por ahora asume default 'RUN')
 
@@ -256,12 +894,12 @@ def fill_organization_details(driver: WebDriver, org_name: str, parent_org_name:
         return True
 
     except TimeoutException as e:
-        logger.error(f"Timeout rellenando detalles de la organización: {e}", exc_info=True)
-        driver.save_screenshot(f"error_fill_details_timeout_{time.strftime('%Y%m%d-%H%M%S')}.png")
+        logger.warning(f"Timeout rellenando detalles de la organización: {e}", exc_info=VERBOSE_ERRORS)
+        _save_screenshot(driver, "error_fill_details_timeout")
         return False
     except Exception as e:
-        logger.error(f"Error inesperado rellenando detalles de la organización: {e}", exc_info=True)
-        driver.save_screenshot(f"error_fill_details_unexpected_{time.strftime('%Y%m%d-%H%M%S')}.png")
+        logger.error(f"Error inesperado rellenando detalles de la organización: {e}", exc_info=VERBOSE_ERRORS)
+        _save_screenshot(driver, "error_fill_details_unexpected")
         return False
 
 def configure_payment_features(driver: WebDriver) -> bool:
@@ -274,51 +912,36 @@ def configure_payment_features(driver: WebDriver) -> bool:
         bool: True si los switches se configuraron correctamente, False en caso contrario.
     """
     try:
-        logger.info("Configurando funcionalidades de pago...")
-
-        # Helper function to toggle a switch if not already active
-        def toggle_switch(switch_label_text: str):
-            logger.info(f"Configurando switch: '{switch_label_text}'")
-            # XPath para encontrar el label que contiene el texto del switch
-            label_xpath = f"//label[.//span[contains(@class, 'MuiFormControlLabel-label') and contains(text(), '{switch_label_text}')]]"
-            switch_label_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, label_xpath))
-            )
-            
-            # Dentro de este label, encontrar el input checkbox
-            checkbox_input = switch_label_element.find_element(By.XPATH, ".//input[@type='checkbox']")
-            
-            if not checkbox_input.is_selected():
-                logger.info(f"Switch '{switch_label_text}' no está activo. Haciendo clic para activar...")
-                # Es más robusto hacer clic en el elemento visible del switch (el span o el label mismo)
-                # que en el input oculto, aunque a veces el input.click() funciona.
-                # Vamos a intentar hacer clic en el switch_label_element, que es el <label>
-                switch_label_element.click()
-                time.sleep(0.5) # Pequeña pausa para que el estado se actualice
-                if checkbox_input.is_selected():
-                    logger.info(f"Switch '{switch_label_text}' activado exitosamente.")
-                else:
-                    logger.warning(f"Se hizo clic en el switch '{switch_label_text}', pero no parece estar seleccionado.")
-                    # Podríamos intentar un segundo método de clic o lanzar un error aquí
+        logger.info(f"Configurando funcionalidades de pago: {PAYMENT_FEATURE_SWITCHES}")
+
+        # El script espera dentro del navegador a que cada switch exista
+        result = _configure_form(driver, switch_labels=PAYMENT_FEATURE_SWITCHES)
+        missing = [label for label, state in zip(PAYMENT_FEATURE_SWITCHES, result["switches"]) if state is None]
+        if missing:
+            raise TimeoutException(f"Switches no encontrados: {missing}")
+        unchecked = []
+        for switch_label_text, is_checked in zip(PAYMENT_FEATURE_SWITCHES, result["switches"]):
+            if is_checked:
+                logger.info(f"Switch '{switch_label_text}' activo.")
             else:
-                logger.info(f"Switch '{switch_label_text}' ya está activo.")
-
-        toggle_switch("Descarga de usuarios")
-        toggle_switch("Gráficos personalizados")
-        # El switch "Envío de correos" está deshabilitado en el HTML de ejemplo (Mui-disabled)
-        # Si necesitara activarse y estuviera habilitado, se añadiría aquí: 
-        # toggle_switch("Envío de correos")
+                logger.warning(f"Se hizo clic en el switch '{switch_label_text}', pero no parece estar seleccionado.")
+                unchecked.append(switch_label_text)
+        if unchecked:
+            # Enviar el formulario sin estas funcionalidades dejaría la organización mal configurada
+            logger.error(f"Switches sin activar: {unchecked}. No se continúa con la fila.")
+            _save_screenshot(driver, "error_payment_features_unchecked")
+            return False
 
         logger.info("Funcionalidades de pago configuradas.")
         return True
 
     except TimeoutException as e:
-        logger.error(f"Timeout configurando funcionalidades de pago: {e}", exc_info=True)
-        driver.save_screenshot(f"error_payment_features_timeout_{time.strftime('%Y%m%d-%H%M%S')}.png")
+        logger.warning(f"Timeout configurando funcionalidades de pago: {e}", exc_info=VERBOSE_ERRORS)
+        _save_screenshot(driver, "error_payment_features_timeout")
         return False
     except Exception as e:
-        logger.error(f"Error inesperado configurando funcionalidades de pago: {e}", exc_info=True)
-        driver.save_screenshot(f"error_payment_features_unexpected_{time.strftime('%Y%m%d-%H%M%S')}.png")
+        logger.error(f"Error inesperado configurando funcionalidades de pago: {e}", exc_info=VERBOSE_ERRORS)
+        _save_screenshot(driver, "error_payment_features_unexpected")
         return False
 
 def add_additional_user_field(driver: WebDriver, field_name: str, field_type: str) -> bool:
@@ -332,131 +955,173 @@ def add_additional_user_field(driver: WebDriver, field_name: str, field_type: st
     Returns:
         bool: True si el campo se añadió y configuró correctamente, False en caso contrario.
     """
-    try:
-        logger.info(f"Añadiendo campo adicional: '{field_name}' (Tipo: {field_type})")
+    return add_additional_user_fields(driver, [{"name": field_name, "type": field_type}])
 
-        # 1. Scroll to the "Datos adicionales sobre los usuarios" header
-        additional_data_header_xpath = "//span[contains(text(), 'Datos adicionales sobre los usuarios')]"
-        try:
-            logger.info(f"Intentando hacer scroll a la sección '{additional_data_header_xpath}'...")
-            header_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, additional_data_header_xpath))
-            )
-            driver.execute_script("arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});", header_element)
-            logger.info("Scroll a la sección de datos adicionales completado.")
-        except TimeoutException:
-            logger.warning(f"No se encontró el encabezado de la sección '{additional_data_header_xpath}'. Continuando con scroll general...")
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);") # Fallback scroll
-        
-        time.sleep(0.5) # Pausa más larga para que cargue el contenido después del scroll
-
-        # 2. Debug Screenshot
-        timestamp_debug = time.strftime("%Y%m%d-%H%M%S")
-        debug_screenshot_filename = f"debug_before_button_wait_{field_name.replace(' ','_')}_{timestamp_debug}.png"
-        try:
-            driver.save_screenshot(debug_screenshot_filename)
-            logger.info(f"Debug screenshot guardado como: {debug_screenshot_filename}")
-        except Exception as e_screenshot:
-            logger.error(f"Error al guardar debug screenshot '{debug_screenshot_filename}': {e_screenshot}")
-
-        button_xpath = ""
-        if field_type == "texto":
-            button_xpath = "//button[contains(normalize-space(), 'Tipo texto')]"
-        elif field_type == "numero":
-            button_xpath = "//button[contains(normalize-space(), 'Tipo número')]"
-        else:
-            logger.error(f"Tipo de campo no soportado: {field_type}")
-            return False
+def add_additional_user_fields(driver: WebDriver, fields: list[dict]) -> bool:
+    """Añade varios campos adicionales para los usuarios en una sola ejecución de JS.
 
-        logger.info(f"Haciendo clic en el botón para añadir campo tipo '{field_type}' (XPath: {button_xpath})...")
-        wait_time = 15 # Segundos
+    Cada campo se crea con el botón de su tipo, se le escribe el nombre y se activa
+    su switch "Mostrar al usuario" (salvo que el campo indique "show": False).
 
-        # 3. Locate Button
-        logger.info(f"Esperando que el botón '{field_type}' esté presente (Timeout: {wait_time}s)...")
-        add_field_button_element = WebDriverWait(driver, wait_time).until(
-            EC.presence_of_element_located((By.XPATH, button_xpath))
-        )
-        
-        # 4. If Found, Scroll to Button & JS Click
-        logger.info(f"Botón '{field_type}' encontrado. Haciendo scroll al elemento y click con JavaScript...")
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});", add_field_button_element)
-        time.sleep(0.5) # Pequeña pausa después del scroll al botón
-        driver.execute_script("arguments[0].click();", add_field_button_element)
-        time.sleep(0.5) # Espera a que aparezca la nueva sección del formulario
-
-        # La nueva sección aparece. Basado en tipotexto.html, esta sección es un Card.
-        # Necesitamos encontrar el ÚLTIMO card de este tipo, ya que se añaden dinámicamente.
-        # Asumimos que los campos adicionales se añaden dentro de un contenedor específico,
-        # y que cada nuevo campo es un nuevo "MuiPaper-root MuiCard-root" dentro de ese contenedor.
-        # El contenedor de "Datos adicionales sobre los usuarios" tiene un MuiCardHeader-content con ese texto.
-        
-        # XPath para la última sección de campo adicional añadida.
-        # Esto busca el último Card que está dentro de un Card que tiene el header "Datos adicionales sobre los usuarios".
-        # Y que además contiene un input para el nombre del dato (para distinguirlo de otros cards).
-        new_field_section_xpath = "(//div[contains(@class, 'MuiCardContent-root') and .//input[contains(@id, ':') and @required]]//ancestor::div[contains(@class, 'MuiPaper-root') and contains(@class, 'MuiCard-root') and not(.//div[contains(@class, 'MuiCardHeader-root')])])[last()]"
-        # Este XPath es complejo y frágil. Una mejor aproximación sería si cada nueva sección tuviera un ID único o un atributo distintivo.
-        # Alternativa: buscar el último card que contenga un input cuyo id empieza con ":r" (o similar si es dinámico y predecible)
-        # Y que también contenga un switch para "Mostrar al usuario"
-        # Por ahora, nos basamos en la estructura de tipotexto.html donde el input tiene un ID dinámico y es required.
-        # Y que no sea el card principal de "Datos adicionales sobre los usuarios" (que sí tiene un MuiCardHeader-root)
-
-        # Simplificando: encontrar el último card que tiene un input para "Nombre del dato"
-        # Asumiendo que los campos se apilan y el último es el recién añadido.
-        # Buscamos un input con label "Nombre del dato" y que sea required.
-        all_name_inputs_xpath = "//label[contains(text(),'Nombre del dato') and .//span[contains(@class, 'MuiFormLabel-asterisk')]]/following-sibling::div//input[@type='text']"
-        
-        # Esperar a que al menos un campo de nombre aparezca después de hacer clic en añadir
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, all_name_inputs_xpath)))
-        
-        name_input_elements = driver.find_elements(By.XPATH, all_name_inputs_xpath)
-        if not name_input_elements:
-            logger.error("No se encontró el campo 'Nombre del dato' después de añadir el campo.")
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        fields (list[dict]): Campos {"name": str, "type": "texto" | "numero", "show": bool}.
+
+    Returns:
+        bool: True si todos los campos se añadieron correctamente, False en caso contrario.
+    """
+    for field in fields:
+        if field["type"] not in FIELD_TYPE_BUTTONS:
+            logger.error(f"Tipo de campo no soportado: {field['type']}")
             return False
-        
-        # El último input de esta lista es el que acabamos de añadir
-        name_input = name_input_elements[-1]
-        logger.info(f"Campo 'Nombre del dato' encontrado. Ingresando: {field_name}")
-        name_input.clear()
-        name_input.send_keys(field_name)
-
-        # Localizar el switch "Mostrar al usuario" DENTRO de la sección del campo recién añadido.
-        # El switch está cerca del input que acabamos de rellenar.
-        # Necesitamos un XPath relativo al contenedor del input `name_input`.
-        # Suponiendo que `name_input` está dentro de un `div.MuiGrid2-root.MuiGrid2-grid-xs-6` y el switch en un `div.MuiGrid2-root.MuiGrid2-grid-xs-3` hermano o cercano.
-        # Vamos a buscar el switch "Mostrar al usuario" que sea descendiente del mismo "abuelo" (el MuiGrid2-container) que el input.
-        field_container_xpath = "./ancestor::div[contains(@class, 'MuiGrid2-container') and contains(@class, 'css-abli9d')]"
-        # Este XPath asume la estructura de `tipotexto.html`.
-        field_container = name_input.find_element(By.XPATH, field_container_xpath)
-        
-        show_user_switch_label_xpath = ".//label[.//span[contains(text(), 'Mostrar al usuario')]]"
-        show_user_switch_label = WebDriverWait(field_container, 10).until(
-            EC.presence_of_element_located((By.XPATH, show_user_switch_label_xpath))
-        )
-        show_user_checkbox = show_user_switch_label.find_element(By.XPATH, ".//input[@type='checkbox']")
-
-        if not show_user_checkbox.is_selected():
-            logger.info("Switch 'Mostrar al usuario' no está activo. Haciendo clic...")
-            show_user_switch_label.click()
-            time.sleep(0.5)
-            if not show_user_checkbox.is_selected():
-                 logger.warning("Se hizo clic en 'Mostrar al usuario', pero no parece estar seleccionado.")
+    try:
+        logger.info(f"Añadiendo campos adicionales: {[field['name'] for field in fields]}")
+        try:
+            result = _configure_form(driver, fields=fields)
+        except WebDriverException as e:
+            # Error del script (o timeout de execute_async_script): se completa campo a campo
+            logger.warning(f"El script de campos adicionales falló ({e.msg}). Usando Selenium campo a campo...")
+            return _add_user_fields_with_selenium(driver, fields)
+        for index, field_result in enumerate(result["fields"]):
+            if field_result["ok"]:
+                logger.info(f"Campo adicional '{field_result['name']}' añadido y configurado.")
             else:
-                 logger.info("Switch 'Mostrar al usuario' activado.")
-        else:
-            logger.info("Switch 'Mostrar al usuario' ya está activo.")
-        
-        logger.info(f"Campo adicional '{field_name}' añadido y configurado.")
-        return True
+                # El script se detiene en el primer fallo (ej. un switch que no se renderizó a
+                # tiempo): el resto, incluido el que falló, se completa campo a campo
+                logger.warning(
+                    f"Error añadiendo campo adicional '{field_result['name']}': {field_result['error']}. "
+                    "Usando Selenium campo a campo..."
+                )
+                return _add_user_fields_with_selenium(driver, fields[index:])
+        return len(result["fields"]) == len(fields)
 
     except TimeoutException as e:
-        logger.error(f"Timeout añadiendo campo adicional '{field_name}': {e}", exc_info=True)
-        driver.save_screenshot(f"error_add_field_timeout_{field_name.replace(' ','_')}_{time.strftime('%Y%m%d-%H%M%S')}.png")
+        logger.warning(f"Timeout añadiendo campos adicionales: {e}", exc_info=VERBOSE_ERRORS)
+        _save_screenshot(driver, "error_add_field_timeout")
         return False
     except Exception as e:
-        logger.error(f"Error inesperado añadiendo campo adicional '{field_name}': {e}", exc_info=True)
-        driver.save_screenshot(f"error_add_field_unexpected_{field_name.replace(' ','_')}_{time.strftime('%Y%m%d-%H%M%S')}.png")
+        logger.error(f"Error inesperado añadiendo campos adicionales: {e}", exc_info=VERBOSE_ERRORS)
+        _save_screenshot(driver, "error_add_field_unexpected")
         return False
 
+def _add_user_fields_with_selenium(driver: WebDriver, fields: list[dict]) -> bool:
+    """Camino alternativo de add_additional_user_fields usando comandos de Selenium.
+
+    No se vuelven a crear los campos cuyo nombre ya está escrito en algún "Nombre del
+    dato", para no duplicar los que el script haya alcanzado a crear antes de fallar; solo
+    se comprueba su switch. Si el script falló tras el clic, queda un "Nombre del dato"
+    requerido vacío: se rellena con el primer campo pendiente (el mismo que falló) en
+    lugar de añadir otro.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        fields (list[dict]): Campos {"name": str, "type": "texto" | "numero", "show": bool}.
+
+    Returns:
+        bool: True si todos los campos se añadieron correctamente, False en caso contrario.
+    """
+    short_wait = _wait(driver, SHORT_WAIT_TIMEOUT)
+    name_inputs = driver.find_elements(*FIELD_NAME_INPUTS)
+    values = [name_input.get_attribute("value") for name_input in name_inputs]
+    existing_inputs = {value: name_input for value, name_input in zip(values, name_inputs) if value}
+    # Inputs que el script creó pero no alcanzó a rellenar (un required vacío bloquea el envío)
+    empty_inputs = [name_input for value, name_input in zip(values, name_inputs) if not value]
+    for field in fields:
+        try:
+            name_input = existing_inputs.get(field["name"])
+            if name_input is not None:
+                # Puede faltar su switch si el script falló justo después de escribir el nombre
+                logger.info(f"Campo adicional '{field['name']}' ya presente. Comprobando su switch.")
+            elif empty_inputs:
+                name_input = empty_inputs.pop(0)
+                logger.info(f"Reutilizando un 'Nombre del dato' vacío para el campo '{field['name']}'.")
+            else:
+                # Esperar el botón, contar los campos existentes y hacer clic en un solo comando por sondeo
+                previous_count = short_wait.until(
+                    lambda d: d.execute_script(_CLICK_FIELD_TYPE_BUTTON_JS, FIELD_TYPE_BUTTONS[field["type"]][1], FIELD_NAME_INPUTS[1])
+                )["count"]
+
+                def new_name_input(d):
+                    """Devuelve el input del nuevo campo (los campos se apilan al final) cuando aparece."""
+                    inputs = d.find_elements(*FIELD_NAME_INPUTS)
+                    return inputs[previous_count] if len(inputs) > previous_count else False
+
+                name_input = short_wait.until(new_name_input)
+            if field["name"] not in existing_inputs:
+                _fast_fill(driver, name_input, field["name"])
+
+            # Localizar el switch, comprobarlo y activarlo en un solo comando por sondeo (puede
+            # tardar en renderizarse, que es uno de los motivos por los que falla el script)
+            if field.get("show", True):
+                short_wait.until(
+                    lambda d: d.execute_script(_ENABLE_SHOW_USER_SWITCH_JS, name_input) is not None,
+                    "Switch 'Mostrar al usuario' no encontrado",
+                )
+            logger.info(f"Campo adicional '{field['name']}' añadido y configurado.")
+        except (TimeoutException, NoSuchElementException) as e:
+            logger.error(f"Error añadiendo campo adicional '{field['name']}': {e}", exc_info=VERBOSE_ERRORS)
+            _save_screenshot(driver, f"error_add_field_{field['name'].replace(' ','_')}")
+            return False
+    return True
+
+def _submit_fast_path(driver: WebDriver) -> str:
+    """Camino feliz del envío: clic en 'Agregar' y espera de la confirmación.
+
+    No captura excepciones; cualquier fallo se diagnostica en submit_organization_form.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+
+    Returns:
+        str: 'redirect' o 'message:<texto>' según la señal de éxito detectada.
+    """
+    def click_submit():
+        submit_button = _wait_two_stage(driver, EC.element_to_be_clickable(SUBMIT_BTN), "Botón 'Agregar'")
+        # El clic por JS no depende de que el scroll haya terminado: ambos van en un solo script
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();", submit_button)
+
+    # Si React vuelve a renderizar el botón entre la búsqueda y el clic, el clic no llega a
+    # ejecutarse (StaleElementReference), por lo que reintentarlo no duplica el envío
+    _retry(click_submit, "Clic en 'Agregar'")
+    logger.info("Botón 'Agregar' clickeado.")
+    # Redirección y mensaje de éxito se comprueban a la vez: se resuelve con la primera señal
+    try:
+        return _wait_for_js_condition(driver, _SUBMIT_OUTCOME_WAIT_JS, SUBMIT_CONFIRMATION_TIMEOUT)
+    except TimeoutException:
+        # TimeoutException hereda de WebDriverException: sin esto, el except siguiente
+        # convertiría un timeout real en un segundo sondeo
+        raise
+    except WebDriverException as e:
+        # Una recarga completa descarta el script asíncrono: se continúa sondeando
+        logger.debug(f"Espera en el navegador interrumpida ({e}). Sondeando la confirmación.")
+        return _wait_two_stage(
+            driver, lambda d: d.execute_script(_SUBMIT_OUTCOME_JS), "Confirmación del envío", SUBMIT_CONFIRMATION_TIMEOUT
+        )
+
+def _submit_diagnostic(driver: WebDriver, org_name: str, error: Exception) -> None:
+    """Registra por qué falló el envío del formulario y guarda una captura.
+
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        org_name (str): Nombre de la organización que se estaba creando.
+        error (Exception): Excepción lanzada por _submit_fast_path.
+    """
+    org_name_safe = org_name.replace(' ', '_')
+    try:
+        current_url = driver.current_url
+    except Exception:
+        current_url = "desconocida"
+    if isinstance(error, TimeoutException):
+        logger.warning(
+            f"Timeout esperando el botón 'Agregar' o la confirmación (redirección a '/admin/organizations' "
+            f"o mensaje de éxito) para {org_name}. URL actual: {current_url}",
+            exc_info=VERBOSE_ERRORS,
+        )
+        _save_screenshot(driver, f"error_submit_timeout_{org_name_safe}")
+    else:
+        logger.error(f"Error inesperado al enviar el formulario para {org_name}: {error}", exc_info=VERBOSE_ERRORS)
+        _save_screenshot(driver, f"error_submit_unexpected_{org_name_safe}")
+
 def submit_organization_form(driver: WebDriver, org_name: str) -> bool:
     """Hace clic en el botón final para agregar la organización y verifica el éxito.
 
@@ -468,212 +1133,301 @@ def submit_organization_form(driver: WebDriver, org_name: str) -> bool:
         bool: True si el formulario se envió y se detectó una condición de éxito,
               False en caso contrario.
     """
+    logger.info(f"Intentando enviar el formulario para la organización: {org_name}")
     try:
-        logger.info(f"Intentando enviar el formulario para la organización: {org_name}")
-        submit_button_xpath = "//button[@type='submit' and contains(normalize-space(), 'Agregar')]"
-        
-        submit_button = WebDriverWait(driver, 15).until(
-            EC.element_to_be_clickable((By.XPATH, submit_button_xpath))
-        )
-        # Scroll into view and click using JavaScript for potentially more reliability
-        driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
-        time.sleep(0.5) # Brief pause after scroll
-        driver.execute_script("arguments[0].click();", submit_button)
-        # submit_button.click() # Original click
-        logger.info("Botón 'Agregar' clickeado.")
-
-        # URL esperada después de una creación exitosa (asumiendo /admin/ path)
-        # ESOCIOS_BASE_URL es "https://esocios.evoting.com"
-        expected_admin_redirect_url = f"{ESOCIOS_BASE_URL}/admin" 
-        # La URL original en la constante global era /superadmin
-
-        # Espera combinada para redirección o mensaje de éxito.
-        # Aumentamos el tiempo total de espera para la confirmación.
-        confirmation_timeout = 30 # segundos
+        outcome = _submit_fast_path(driver)
+    except Exception as e:
+        _submit_diagnostic(driver, org_name, e)
+        return False
 
-        try:
-            # Prioridad 1: Verificar redirección a la lista de organizaciones (/admin/organizations)
-            logger.info(f"Esperando redirección a una URL que contenga '/admin/organizations' (Timeout: {confirmation_timeout}s)")
-            WebDriverWait(driver, confirmation_timeout).until(
-                EC.url_contains("/admin/organizations")
-            )
-            # Adicionalmente, asegurarse de que no estamos en la página de 'add'
-            current_url_after_redirect = driver.current_url
-            if "/add" not in current_url_after_redirect:
-                logger.info(f"Redirección a '{current_url_after_redirect}' detectada (contiene '/admin/organizations' y no '/add'). Asumiendo éxito para {org_name}.")
-                return True
-            else:
-                logger.warning(f"Redirección a '{current_url_after_redirect}' pero aún contiene '/add'. Verificando mensaje de éxito.")
+    if outcome == "redirect":
+        logger.info(f"Redirección a '{driver.current_url}' detectada. Asumiendo éxito para {org_name}.")
+    else:
+        logger.info(f"Mensaje de éxito encontrado en la página actual: '{outcome[len('message:'):]}'. Asumiendo éxito para {org_name}.")
+    return True
 
-        except TimeoutException:
-            current_url_at_timeout = driver.current_url
-            logger.warning(
-                f"No hubo redirección clara a '/admin/organizations' después de {confirmation_timeout}s. "
-                f"URL actual: {current_url_at_timeout}. Intentando buscar mensaje de éxito."
-            )
+def _create_organization(driver: WebDriver, org_name: str, parent_org_name: str = None) -> tuple[bool, str]:
+    """Completa y envía el formulario de creación para una organización.
 
-        # Prioridad 2: Si no hubo redirección clara, buscar un mensaje de éxito en la página actual.
-        # Esto es útil si la creación es exitosa pero permanece en la misma página (quizás con formulario reseteado)
-        # o si la redirección fue a otra página que no es la lista principal pero muestra un éxito.
-        success_message_xpath = "//*[contains(@class, 'MuiAlert-filledSuccess') or @role='alert'][contains(normalize-space(), 'Organización creada') or contains(normalize-space(), 'éxito') or contains(normalize-space(), 'correctamente')]"
-        try:
-            # Usar un timeout más corto aquí, ya que la mayor parte del tiempo de confirmación ya pasó.
-            success_element = WebDriverWait(driver, 10).until( 
-                EC.visibility_of_element_located((By.XPATH, success_message_xpath))
-            )
-            logger.info(f"Mensaje de éxito encontrado en la página actual: '{success_element.text}'. Asumiendo éxito para {org_name}.")
-            return True
-        except TimeoutException:
-            logger.error(
-                f"No se detectó redirección a '/admin/organizations' ni un mensaje de éxito claro para {org_name} "
-                f"después de {confirmation_timeout + 10}s totales de espera."
-            )
-            driver.save_screenshot(f"error_submit_no_confirmation_{org_name.replace(' ','_')}_{time.strftime('%Y%m%d-%H%M%S')}.png")
-            return False
+    Asume que el driver ya está en la página de creación de organizaciones.
 
-    except TimeoutException as e:
-        logger.error(f"Timeout esperando el botón 'Agregar' o durante el proceso de envío para {org_name}: {e}", exc_info=True)
-        driver.save_screenshot(f"error_submit_timeout_btn_{org_name.replace(' ','_')}_{time.strftime('%Y%m%d-%H%M%S')}.png")
-        return False
+    Args:
+        driver: Instancia del WebDriver de Selenium.
+        org_name (str): Nombre de la nueva organización.
+        parent_org_name (str, optional): Nombre de la organización padre. Defaults to None.
+
+    Returns:
+        tuple[bool, str]: (éxito, mensaje de estado para la columna D).
+    """
+    if not fill_organization_details(driver, org_name, parent_org_name):
+        return False, f"Error: Fallo al rellenar detalles para {org_name}"
+    if not configure_payment_features(driver):
+        return False, f"Error: Fallo al config. pago para {org_name}"
+    if not add_additional_user_fields(driver, ADDITIONAL_USER_FIELDS):
+        return False, f"Error: Fallo al añadir campos adicionales para {org_name}"
+    if not submit_organization_form(driver, org_name):
+        return False, f"Error: Fallo al enviar form para {org_name}"
+    return True, f"Éxito: Org '{org_name}' creada."
+
+def _create_driver(slot_id: int) -> WebDriver:
+    """Crea un WebDriver configurado para el runner con el perfil de Chrome del slot.
+
+    Args:
+        slot_id (int): Identificador del slot del pool; define el directorio de perfil.
+
+    Returns:
+        WebDriver: Driver configurado, o None si no se pudo crear.
+    """
+    profile_dir = os.path.join(tempfile.gettempdir(), f"esocios_profile_{slot_id}")
+    # Las imágenes solo se cargan si se van a tomar capturas de depuración
+    driver = setup_webdriver(headless_mode=HEADLESS_MODE, block_heavy_assets=not DEBUG_SCREENSHOTS, user_data_dir=profile_dir)
+    if driver is None:
+        return None
+
+    # Todas las esperas del runner son explícitas; ver nota junto a _wait
+    driver.implicitly_wait(0)
+    driver.set_script_timeout(SCRIPT_TIMEOUT)
+    try:
+        # Asegura que no quede emulación de red (latencia/throttling) activa en el perfil
+        driver.set_network_conditions(offline=False, latency=0, download_throughput=-1, upload_throughput=-1)
     except Exception as e:
-        logger.error(f"Error inesperado al enviar el formulario para {org_name}: {e}", exc_info=True)
-        driver.save_screenshot(f"error_submit_unexpected_{org_name.replace(' ','_')}_{time.strftime('%Y%m%d-%H%M%S')}.png")
+        logger.warning(f"No se pudieron restablecer las condiciones de red del WebDriver: {e}")
+    return driver
+
+def _prepare_slot(slot: dict) -> str:
+    """Asegura que el slot tenga un driver con sesión iniciada, creándolo si hace falta.
+
+    Args:
+        slot (dict): Slot del pool {"id": int, "driver": WebDriver | None, "logged_in": bool,
+            "needs_renav": bool}.
+
+    Returns:
+        str: Mensaje de error para la columna D, o None si el slot quedó listo.
+    """
+    if slot["driver"] is None:
+        slot["driver"] = _create_driver(slot["id"])
+        slot["logged_in"] = False
+        if slot["driver"] is None:
+            return "Error: No se pudo configurar el WebDriver"
+    if not slot["logged_in"]:
+        if not login_to_esocios(slot["driver"]):
+            return "Error: Fallo en el login de E-Socios"
+        slot["logged_in"] = True
+    return None
+
+def _record_result(spreadsheet_url_or_id: str, sheet_name: str, current_row_in_sheet: int, slug: str, final_status: str, processing_status: str) -> None:
+    """Añade el resultado de una fila a RESULTS_LOG_FILE.
+
+    Args:
+        spreadsheet_url_or_id (str): URL o ID del Google Sheet.
+        sheet_name (str): Nombre de la pestaña.
+        current_row_in_sheet (int): Número de fila en el Sheet (1-based, con encabezado).
+        slug (str): Slug de la fila, para validar el resultado al recuperarlo.
+        final_status (str): Valor de la columna D.
+        processing_status (str): Valor de la columna E.
+    """
+    try:
+        with _results_log_lock, open(RESULTS_LOG_FILE, 'a', newline='', encoding='utf-8') as file:
+            csv.writer(file).writerow([spreadsheet_url_or_id, sheet_name, current_row_in_sheet, slug, final_status, processing_status])
+    except OSError as e:
+        logger.warning(f"No se pudo registrar el resultado de la fila {current_row_in_sheet} en {RESULTS_LOG_FILE}: {e}")
+
+def _load_recorded_results(spreadsheet_url_or_id: str, sheet_name: str) -> dict:
+    """Lee los resultados de RESULTS_LOG_FILE que corresponden a la hoja indicada.
+
+    Args:
+        spreadsheet_url_or_id (str): URL o ID del Google Sheet.
+        sheet_name (str): Nombre de la pestaña.
+
+    Returns:
+        dict: {fila: (slug, estado final, estado de procesamiento)}; el último registro gana.
+    """
+    results = {}
+    try:
+        with open(RESULTS_LOG_FILE, 'r', newline='', encoding='utf-8') as file:
+            for record in csv.reader(file):
+                if len(record) == 6 and record[0] == spreadsheet_url_or_id and record[1] == sheet_name:
+                    results[int(record[2])] = (record[3], record[4], record[5])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"No se pudo leer el registro local de resultados {RESULTS_LOG_FILE}: {e}")
+    return results
+
+def _clear_results_log() -> None:
+    """Elimina RESULTS_LOG_FILE una vez que sus resultados ya están en el Sheet."""
+    try:
+        os.remove(RESULTS_LOG_FILE)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"No se pudo eliminar el registro local de resultados {RESULTS_LOG_FILE}: {e}")
+
+def _reject_invalid_row(current_row_in_sheet: int, row_values: tuple, spreadsheet_url_or_id: str, sheet_name: str) -> bool:
+    """Marca en el Sheet las filas sin Slug o Nombre Organización, sin usar el navegador.
+
+    Args:
+        current_row_in_sheet (int): Número de fila en el Sheet (1-based, con encabezado).
+        row_values (tuple): Valores de la fila en el orden de ROW_COLUMNS.
+        spreadsheet_url_or_id (str): URL o ID del Google Sheet.
+        sheet_name (str): Nombre de la pestaña.
+
+    Returns:
+        bool: True si la fila es inválida (y ya se encoló su estado de error), False si es válida.
+    """
+    slug, org_name, _ = row_values
+    if slug and org_name:
         return False
+    status_message = "Error: Datos faltantes (Slug o Nombre Organización)"
+    logger.warning(f"{status_message} en fila {current_row_in_sheet}.")
+    queue_row_update(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, {
+        STATUS_COLUMN_INDEX: status_message,
+        PROCESSING_STATUS_COLUMN_INDEX: "Error Datos",
+    })
+    return True
+
+def process_one_org(driver_pool: WebDriverPool, current_row_in_sheet: int, row_values: tuple, spreadsheet_url_or_id: str, sheet_name: str) -> bool:
+    """Procesa una fila del Sheet (ya validada por _reject_invalid_row) con un driver del pool.
+
+    El driver y su sesión de login se devuelven al pool para la siguiente fila; si
+    ocurre una excepción el driver se descarta y se recrea al volver a usarse.
+
+    Args:
+        driver_pool (WebDriverPool): Pool de drivers ya preparados.
+        current_row_in_sheet (int): Número de fila en el Sheet (1-based, con encabezado).
+        row_values (tuple): Valores de la fila en el orden de ROW_COLUMNS.
+        spreadsheet_url_or_id (str): URL o ID del Google Sheet.
+        sheet_name (str): Nombre de la pestaña.
+
+    Returns:
+        bool: True si la organización se creó exitosamente, False en caso contrario.
+    """
+    slug, org_name, parent_org_name = row_values
+
+    logger.info(f"Procesando fila {current_row_in_sheet} del sheet: Slug='{slug}', Nombre='{org_name}', Padre='{parent_org_name}'")
+
+    # Marcar la fila como "Iniciado" en la columna de estado de procesamiento (E).
+    # main_esocios_flow solo despacha filas válidas: las inválidas ya se marcaron allí.
+    queue_cell_update(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, PROCESSING_STATUS_COLUMN_INDEX, "Iniciado")
+    logger.info(f"Fila {current_row_in_sheet}: Marcada como 'Iniciado' en columna {PROCESSING_STATUS_COLUMN_INDEX}.")
+
+    all_steps_successful = False
+    _begin_row_screenshots()
+    slot = driver_pool.acquire()
+    try:
+        status_message = _prepare_slot(slot)
+        if status_message is None:
+            driver = slot["driver"]
+            if not navigate_to_create_organization_page(driver, force_reload=slot["needs_renav"]):
+                status_message = "Error: Fallo al navegar a página de creación"
+                # Solo se vuelve a autenticar si la sesión expiró (la app redirigió al login);
+                # si no, basta con recargar la página de creación en la siguiente fila
+                slot["logged_in"] = AuthManager(driver, login_url=ESOCIOS_LOGIN_URL).is_logged_in()
+            else:
+                all_steps_successful, status_message = _create_organization(driver, org_name, parent_org_name)
+            # Tras un envío exitoso la app queda en /admin/organizations y basta la navegación
+            # SPA; tras un fallo se recarga la página completa en la siguiente fila.
+            slot["needs_renav"] = not all_steps_successful
+    except Exception as e:
+        status_message = f"Error: Excepción procesando {org_name}"
+        logger.error(f"Fila {current_row_in_sheet}: Excepción inesperada: {e}", exc_info=True)
+        driver_pool.discard_driver(slot)
+    finally:
+        driver_pool.release(slot)
+        _end_row_screenshots(persist=not all_steps_successful)
+
+    logger.info(f"Fila {current_row_in_sheet}: Resultado final - {status_message}")
+    processing_status = "Completado" if all_steps_successful else "Error Final"
+    _record_result(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, str(slug), status_message, processing_status)
+    queue_row_update(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, {
+        STATUS_COLUMN_INDEX: status_message,  # Columna D
+        PROCESSING_STATUS_COLUMN_INDEX: processing_status,  # Columna E
+    })
+    return all_steps_successful
 
 def main_esocios_flow():
-    """Función principal para el flujo de creación de organizaciones en E-Socios."""
-    driver = None
+    """Función principal para el flujo de creación de organizaciones en E-Socios.
+
+    Las filas pendientes se reparten entre varios workers que toman drivers ya
+    logueados de un pool y los devuelven al terminar cada fila, ya que la creación
+    de cada organización es independiente.
+    """
+    driver_pool = None
+    sheet_read = False
     try:
-        logger.info("Configurando WebDriver...")
         # Usar la variable HEADLESS_MODE importada de src.config
         logger.info(f"Valor de HEADLESS_MODE (importado de src.config) en runner: {HEADLESS_MODE} (Tipo: {type(HEADLESS_MODE)})")
 
-        driver = setup_webdriver(headless_mode=HEADLESS_MODE) # Usar HEADLESS_MODE directamente
-        
-        if not driver:
-            logger.error("No se pudo configurar el WebDriver. Abortando.")
-            return
+        # .env se carga una sola vez al importar src.config; aquí solo se usan sus constantes
+        spreadsheet_url_or_id = SPREADSHEET_URL_OR_ID
+        sheet_name = SHEET_NAME
 
-        if not login_to_esocios(driver):
-            logger.error("Fallo en el login de E-Socios. Abortando.")
-            return
-        
-        logger.info("Login exitoso. Procediendo...")
-
-        spreadsheet_url_or_id = os.getenv("SPREADSHEET_URL_OR_ID")
-        sheet_name = os.getenv("SHEET_NAME", "Slugs")
-        
-        # Definición de encabezados de columna
-        slug_column_header = "Slug"
-        org_name_column_header = "Nombre Organización"
-        parent_org_column_header = "Organización padre"
-        # Asume que la columna D (índice 4) se llamará "Estado Final" en el Sheet
-        # y la columna E (índice 5) se llamará "Estado Procesamiento"
-        final_status_column_header = "Estado Final" 
-        processing_status_column_header = "Estado Procesamiento"
-
-        # Índices de columna (1-indexed) para escribir en el Sheet
-        status_column_index = 4  # Columna D para el estado final (sin cambios)
-        processing_status_column_index = 5 # Columna E para el estado de "en proceso"
-        
         logger.info(f"Leyendo datos desde Google Sheet ID: {spreadsheet_url_or_id}, Hoja: {sheet_name}")
-        sheet_data = read_sheet_data(spreadsheet_url_or_id, sheet_name)
-        
-        if not sheet_data:
-            logger.warning("No se encontraron datos en el Google Sheet o no se pudo acceder. Abortando.")
+        # Se lee la columna de estado final (D) en el momento y solo se traen
+        # completas las filas sin estado, por si otra ejecución ya avanzó filas
+        try:
+            sheet_rows = read_pending_rows(spreadsheet_url_or_id, sheet_name, STATUS_COLUMN_INDEX, columns=ROW_COLUMNS)
+        except Exception as e:
+            logger.error(f"No se pudo leer el Google Sheet: {e}. Abortando.")
             return
-
-        logger.info(f"Se encontraron {len(sheet_data)} filas de datos en el Google Sheet.")
-
-        initial_navigation_successful = navigate_to_create_organization_page(driver)
-        if not initial_navigation_successful:
-            logger.error("Fallo inicial al navegar a la página de creación. Se intentará por organización.")
-
-        for i, row_data in enumerate(sheet_data):
-            current_row_in_sheet = i + 2 
-            status_message = ""
-
-            # Leer estados actuales de la fila desde los datos del sheet
-            final_status_value = str(row_data.get(final_status_column_header, "")).strip()
-            # processing_status_value = str(row_data.get(processing_status_column_header, "")).strip() # Opcional si queremos lógica más compleja con este estado
-
-            # Condición 1: Saltar si la columna de estado final (D) ya tiene contenido
-            if final_status_value:
-                logger.info(f"Fila {current_row_in_sheet}: Ya tiene un estado final ('{final_status_value}'). Saltando.")
+        sheet_read = True
+
+        recorded_results = _load_recorded_results(spreadsheet_url_or_id, sheet_name)
+        pending_rows = []
+        for current_row_in_sheet, row_values in sheet_rows:
+            # Filas ya procesadas en una ejecución anterior cuyo estado no llegó al Sheet
+            recorded = recorded_results.get(current_row_in_sheet)
+            if recorded and recorded[0] == str(row_values[0]):
+                logger.info(f"Fila {current_row_in_sheet}: Resultado recuperado del registro local ('{recorded[1]}'). Saltando.")
+                queue_row_update(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, {
+                    STATUS_COLUMN_INDEX: recorded[1],
+                    PROCESSING_STATUS_COLUMN_INDEX: recorded[2],
+                })
                 continue
-            
-            # Marcar la fila como "Iniciado" en la columna de estado de procesamiento (E)
-            update_cell_in_sheet(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, processing_status_column_index, "Iniciado")
-            logger.info(f"Fila {current_row_in_sheet}: Marcada como 'Iniciado' en columna {processing_status_column_index}.")
-
-            # Re-navegar si es necesario
-            if not initial_navigation_successful or i > 0: 
-                if not navigate_to_create_organization_page(driver):
-                    status_message = "Error: Fallo al navegar a página de creación"
-                    logger.error(f"{status_message} para fila {current_row_in_sheet}.")
-                    update_cell_in_sheet(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, status_column_index, status_message)
-                    # Opcional: Limpiar marca "Iniciado" o poner "Error Navegación" en columna E
-                    # update_cell_in_sheet(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, processing_status_column_index, "Error Navegación")
-                    continue 
-                else:
-                    initial_navigation_successful = True
-
-            slug = row_data.get(slug_column_header)
-            org_name = row_data.get(org_name_column_header)
-            parent_org_name = row_data.get(parent_org_column_header)
-            
-            logger.info(f"Procesando fila {current_row_in_sheet} del sheet: Slug='{slug}', Nombre='{org_name}', Padre='{parent_org_name}'")
-
-            if not slug or not org_name:
-                status_message = "Error: Datos faltantes (Slug o Nombre Organización)"
-                logger.warning(f"{status_message} en fila {current_row_in_sheet}.")
-                update_cell_in_sheet(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, status_column_index, status_message)
-                update_cell_in_sheet(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, processing_status_column_index, "Error Datos") # Actualizar estado en E
+            # Las filas sin datos obligatorios se marcan sin abrir navegador
+            if _reject_invalid_row(current_row_in_sheet, row_values, spreadsheet_url_or_id, sheet_name):
                 continue
-            
-            all_steps_successful = False
-            if fill_organization_details(driver, org_name, parent_org_name):
-                if configure_payment_features(driver):
-                    additional_fields = [
-                        {"name": "Apellido", "type": "texto"},
-                        {"name": "Sexo", "type": "texto"},
-                        {"name": "Región", "type": "texto"},
-                        {"name": "Provincia", "type": "texto"},
-                        {"name": "Comuna", "type": "texto"},
-                        {"name": "RSU/RAF", "type": "numero"}
-                    ]
-                    all_additional_fields_added = True
-                    for field_idx, field in enumerate(additional_fields):
-                        if not add_additional_user_field(driver, field["name"], field["type"]):
-                            status_message = f"Error: Fallo al añadir campo '{field['name']}' para {org_name}"
-                            all_additional_fields_added = False
-                            break
-                    if all_additional_fields_added:
-                        if submit_organization_form(driver, org_name):
-                            status_message = f"Éxito: Org '{org_name}' creada."
-                            all_steps_successful = True
-                        else:
-                            status_message = f"Error: Fallo al enviar form para {org_name}"
-                    # else: status_message ya está seteado por el fallo en add_additional_user_field
-                else:
-                    status_message = f"Error: Fallo al config. pago para {org_name}"
-            else:
-                status_message = f"Error: Fallo al rellenar detalles para {org_name}"
+            pending_rows.append((current_row_in_sheet, row_values))
+        # Los estados de filas inválidas (y los recuperados del registro local) se envían
+        # en un solo batch_update antes de abrir ningún navegador
+        flush_cell_updates()
 
-            logger.info(f"Fila {current_row_in_sheet}: Resultado final - {status_message}")
-            update_cell_in_sheet(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, status_column_index, status_message) # Columna D
-            update_cell_in_sheet(spreadsheet_url_or_id, sheet_name, current_row_in_sheet, processing_status_column_index, "Completado" if all_steps_successful else "Error Final") # Columna E
-            
-            initial_navigation_successful = False # Forzar re-navegación para la siguiente org
-            
-        logger.info("Flujo de E-Socios completado para todas las filas procesables del sheet.")
+        if not pending_rows:
+            logger.info("No hay filas pendientes de procesar.")
+            return
+
+        max_workers = min(MAX_WORKERS, len(pending_rows))
+        logger.info(f"Procesando {len(pending_rows)} filas con {max_workers} workers en paralelo.")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Los drivers se crean y loguean en paralelo antes de repartir filas
+            driver_pool = WebDriverPool(max_workers, _prepare_slot)
+            driver_pool.start()
+
+            futures = {
+                executor.submit(process_one_org, driver_pool, row_number, row_values, spreadsheet_url_or_id, sheet_name): row_number
+                for row_number, row_values in pending_rows
+            }
+            # Se recoge cada fila al terminar: un fallo inesperado en una no aborta el resto
+            successful = 0
+            for done_count, future in enumerate(as_completed(futures), start=1):
+                try:
+                    if future.result():
+                        successful += 1
+                except Exception as e:
+                    logger.error(f"Fila {futures[future]}: Error no controlado en el worker: {e}", exc_info=True)
+                logger.info(f"Progreso: {done_count}/{len(futures)} filas procesadas ({successful} exitosas).")
+
+        logger.info(f"Flujo de E-Socios completado: {successful}/{len(pending_rows)} organizaciones creadas.")
 
     except Exception as e:
         logger.error(f"Error crítico en el flujo principal de E-Socios: {e}", exc_info=True)
     finally:
-        if driver:
-            logger.info("Cerrando WebDriver de E-Socios.")
-            driver.quit()
+        if driver_pool is not None:
+            driver_pool.close()
+        # El registro local solo se descarta si todos los estados llegaron al Sheet
+        if flush_cell_updates() and sheet_read and not failed_cell_update_flushes():
+            _clear_results_log()
+        flush_screenshots()
 
 if __name__ == '__main__':
     main_esocios_flow() 
\ No newline at end of file
@@ -1,7 +1,15 @@
 import gspread
+from gspread.utils import rowcol_to_a1
 from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import os
+import threading
+import time
+from collections import deque
+from functools import lru_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,16 +25,81 @@ SCOPE = [
 # Ensure 'actualizacion-padron-b0c0035f9580.json' is in the project root or specify the correct path.
 SERVICE_ACCOUNT_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'actualizacion-padron-b0c0035f9580.json')
 
+# Actualizaciones pendientes: (spreadsheet_url_or_id, sheet_name, {(row_index, col_index): value}).
+# Las celdas de una misma fila se encolan como un solo elemento para que viajen en el mismo lote.
+# deque.append es thread-safe, por lo que los workers encolan sin bloquearse entre sí.
+_pending_cell_updates = deque()
+_flush_lock = threading.Lock()
+_flusher_start_lock = threading.Lock()
+_flusher_thread = None
+# Lotes que no se pudieron enviar desde el inicio del proceso (incluye los del hilo de fondo)
+_failed_flushes = 0
+
+# Cada cuántos segundos el hilo de fondo envía las actualizaciones acumuladas
+CELL_UPDATE_FLUSH_INTERVAL = 2.0
+# Filas encoladas a partir de las cuales el envío se adelanta sin esperar el intervalo
+CELL_UPDATE_MAX_PENDING = 20
+# Separación mínima entre lotes del hilo de fondo: como mucho un batch_update por hoja
+# y segundo, bajo la cuota de 60 escrituras por minuto de la API de Sheets
+CELL_UPDATE_MIN_INTERVAL = 1.0
+_flush_requested = threading.Event()
+
+# Conexiones keep-alive hacia la API y reintentos con backoff exponencial ante cuota (429)
+# o errores 5xx. El jitter evita que varios workers reintenten a la vez y, si la API envía
+# Retry-After, urllib3 respeta ese plazo. Las escrituras son batch_update con valores fijos,
+# por lo que reintentar POST es seguro.
+HTTP_POOL_MAXSIZE = 4
+HTTP_RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    backoff_max=4.0,
+    backoff_jitter=0.25,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=None,
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+def _build_http_session(creds: Credentials) -> AuthorizedSession:
+    """Crea la sesión HTTP autenticada que comparten todas las llamadas a Sheets.
+
+    Args:
+        creds (Credentials): Credenciales de la cuenta de servicio.
+
+    Returns:
+        AuthorizedSession: Sesión con pool de conexiones persistentes y reintentos.
+    """
+    session = AuthorizedSession(creds)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=HTTP_RETRY)
+    session.mount("https://", adapter)
+    return session
+
+@lru_cache(maxsize=1)
+def _get_http_session() -> AuthorizedSession:
+    """Devuelve la sesión HTTP autenticada del proceso, creándola la primera vez."""
+    creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPE)
+    return _build_http_session(creds)
+
+@lru_cache(maxsize=1)
 def get_google_sheets_client():
     """Autentica con Google Sheets API y devuelve un cliente gspread.
 
+    El cliente se crea una sola vez por proceso y se reutiliza en las llamadas siguientes,
+    sobre una única sesión HTTP con conexiones persistentes (que renueva sola el token).
+    Un fallo no queda cacheado: la siguiente llamada vuelve a autenticar. Un cliente
+    válido, en cambio, se conserva hasta que reset_sheets_cache lo descarta, lo que solo
+    ocurre tras un error 401/403/404 de la API.
+
     Returns:
         gspread.Client: Cliente gspread autenticado.
-        None: Si la autenticación falla.
+
+    Raises:
+        FileNotFoundError: Si no existe el archivo de credenciales.
+        Exception: Cualquier otro error de autenticación o de red, tras registrarlo.
     """
     try:
-        creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPE)
-        client = gspread.authorize(creds)
+        session = _get_http_session()
+        client = gspread.Client(auth=session.credentials, session=session)
         logger.info("Autenticación con Google Sheets exitosa.")
         return client
     except FileNotFoundError:
@@ -36,6 +109,71 @@ def get_google_sheets_client():
         logger.error(f"Error durante la autenticación con Google Sheets: {e}", exc_info=True)
         raise
 
+@lru_cache(maxsize=None)
+def get_worksheet(spreadsheet_url_or_id: str, sheet_name: str):
+    """Abre (una sola vez) y devuelve la pestaña indicada de un Google Sheet.
+
+    Args:
+        spreadsheet_url_or_id (str): La URL completa de la Google Sheet o su ID.
+        sheet_name (str): El nombre de la pestaña (worksheet).
+
+    Returns:
+        gspread.Worksheet: Handle de la pestaña, cacheado para llamadas posteriores.
+
+    Raises:
+        gspread.exceptions.SpreadsheetNotFound: Si el spreadsheet no existe o no es accesible.
+        gspread.exceptions.WorksheetNotFound: Si la pestaña no existe.
+    """
+    client = get_google_sheets_client()
+    if spreadsheet_url_or_id.startswith("https://"):
+        logger.info(f"Abriendo spreadsheet por URL: {spreadsheet_url_or_id}")
+        spreadsheet = client.open_by_url(spreadsheet_url_or_id)
+    else:
+        # Asumir que si no es una URL, es un ID/key para abrir con open_by_key
+        logger.info(f"Intentando abrir spreadsheet por key/ID: {spreadsheet_url_or_id}")
+        spreadsheet = client.open_by_key(spreadsheet_url_or_id)
+    return spreadsheet.worksheet(sheet_name)
+
+def reset_sheets_cache() -> None:
+    """Descarta el cliente y los handles de pestañas cacheados (ej. tras expirar credenciales)."""
+    get_worksheet.cache_clear()
+    get_google_sheets_client.cache_clear()
+    _get_http_session.cache_clear()
+
+# Errores de API tras los que el cliente o las pestañas cacheadas pueden haber quedado
+# inválidos (credenciales revocadas, pestaña renombrada o eliminada)
+SHEETS_CACHE_RESET_STATUSES = (401, 403, 404)
+
+# Errores de API transitorios: si persisten tras los reintentos de HTTP_RETRY, el lote
+# vuelve a la cola para el siguiente envío en lugar de descartarse
+SHEETS_TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+def _reset_cache_on_fatal_error(error: gspread.exceptions.APIError) -> None:
+    """Descarta los handles cacheados si el error indica que ya no son válidos.
+
+    Args:
+        error (gspread.exceptions.APIError): Error devuelto por la API de Sheets.
+    """
+    status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code in SHEETS_CACHE_RESET_STATUSES:
+        logger.warning(f"Error {status_code} de la API de Sheets: se descartan el cliente y las pestañas cacheados.")
+        reset_sheets_cache()
+
+def _load_records(spreadsheet_url_or_id: str, sheet_name: str) -> list[dict]:
+    """Lee la hoja completa (encabezado incluido) con un solo values.get y arma los diccionarios.
+
+    A diferencia de get_all_records no se convierten los números: todas las celdas
+    llegan como texto, igual que en read_pending_rows.
+    """
+    values = get_worksheet(spreadsheet_url_or_id, sheet_name).get_values()
+    if not values:
+        return []
+    headers = values[0]
+    return [
+        {header: row[j] if j < len(row) else "" for j, header in enumerate(headers)}
+        for row in values[1:]
+    ]
+
 def read_sheet_data(spreadsheet_name_or_url: str, sheet_name: str) -> list[dict]:
     """Lee datos de una hoja específica en un Google Sheet.
 
@@ -48,23 +186,8 @@ def read_sheet_data(spreadsheet_name_or_url: str, sheet_name: str) -> list[dict]
                     Las claves del diccionario son los encabezados de las columnas.
                     Devuelve una lista vacía si la hoja está vacía o ocurre un error.
     """
-    client = get_google_sheets_client()
-    if not client:
-        return []
-
     try:
-        if spreadsheet_name_or_url.startswith("https://"):
-            spreadsheet = client.open_by_url(spreadsheet_name_or_url)
-            logger.info(f"Abriendo spreadsheet por URL: {spreadsheet_name_or_url}")
-        else:
-            # Asumir que si no es una URL, es un ID/key para abrir con open_by_key
-            # O podría ser un nombre, pero open_by_key fallará si no es un ID válido.
-            # Dado que el runner pasa un ID, priorizamos open_by_key.
-            logger.info(f"Intentando abrir spreadsheet por key/ID: {spreadsheet_name_or_url}")
-            spreadsheet = client.open_by_key(spreadsheet_name_or_url) 
-        
-        worksheet = spreadsheet.worksheet(sheet_name)
-        records = worksheet.get_all_records()
+        records = _load_records(spreadsheet_name_or_url, sheet_name)
         logger.info(f"Datos leídos de la hoja '{sheet_name}' en el spreadsheet '{spreadsheet_name_or_url}'.")
         return records
     except gspread.exceptions.SpreadsheetNotFound:
@@ -79,8 +202,88 @@ def read_sheet_data(spreadsheet_name_or_url: str, sheet_name: str) -> list[dict]
         # Por ahora, propagamos para ser explícitos sobre el fallo.
         raise
 
+def _column_letter(col_index: int) -> str:
+    """Devuelve la letra de columna A1 para un índice 1-based (ej. 4 -> "D")."""
+    return rowcol_to_a1(1, col_index)[:-1]
+
+def _contiguous_runs(row_numbers: list[int]) -> list[list[int]]:
+    """Agrupa números de fila ordenados en tramos consecutivos.
+
+    Args:
+        row_numbers (list[int]): Números de fila en orden ascendente.
+
+    Returns:
+        list[list[int]]: [primera, última] de cada tramo (ej. [2, 3, 5] -> [[2, 3], [5, 5]]).
+    """
+    runs = []
+    for row_number in row_numbers:
+        if runs and runs[-1][1] == row_number - 1:
+            runs[-1][1] = row_number
+        else:
+            runs.append([row_number, row_number])
+    return runs
+
+def read_pending_rows(spreadsheet_url_or_id: str, sheet_name: str, status_col_index: int, columns: list[str] = None) -> list[tuple]:
+    """Lee solo las filas cuya columna de estado está vacía.
+
+    Primero obtiene en un único batch_get los encabezados, la primera columna (para
+    conocer el largo de la hoja) y la columna de estado; luego trae en un segundo
+    batch_get únicamente las filas pendientes, agrupadas en rangos contiguos.
+
+    Args:
+        spreadsheet_url_or_id (str): La URL completa de la Google Sheet o su ID.
+        sheet_name (str): El nombre de la pestaña (worksheet).
+        status_col_index (int): Columna (1-based) cuyo contenido marca la fila como procesada.
+        columns (list[str], optional): Encabezados a devolver. Si se indican, cada fila es una
+            tupla con esos valores en ese orden ("" si el encabezado no existe) y solo se piden
+            a la API las columnas hasta la última necesaria. Defaults to None.
+
+    Returns:
+        list[tuple]: (número de fila 1-based, {encabezado: valor}) por cada fila pendiente,
+            o (número de fila, (valor, ...)) si se indicó columns.
+    """
+    worksheet = get_worksheet(spreadsheet_url_or_id, sheet_name)
+    status_col = _column_letter(status_col_index)
+    header_values, key_values, status_values = worksheet.batch_get(["1:1", "A2:A", f"{status_col}2:{status_col}"])
+    headers = header_values[0] if header_values else []
+    if not headers:
+        return []
+
+    total_rows = max(len(key_values), len(status_values))
+    pending_rows = []
+    for i in range(total_rows):
+        status = status_values[i][0] if i < len(status_values) and status_values[i] else ""
+        if not str(status).strip():
+            pending_rows.append(i + 2)
+    logger.info(f"{total_rows - len(pending_rows)} filas con estado en '{sheet_name}'; {len(pending_rows)} pendientes.")
+    if not pending_rows:
+        return []
+
+    # Posición de cada columna pedida (None si el encabezado no existe); sin columns, todas
+    if columns is None:
+        indices = list(range(len(headers)))
+    else:
+        indices = [headers.index(column) if column in headers else None for column in columns]
+    width = max((i + 1 for i in indices if i is not None), default=1)
+
+    # Agrupar filas consecutivas para pedir pocos rangos
+    runs = _contiguous_runs(pending_rows)
+    last_col = _column_letter(width)
+    values_by_run = worksheet.batch_get([f"A{start}:{last_col}{end}" for start, end in runs])
+
+    rows = []
+    for (start, end), values in zip(runs, values_by_run):
+        for offset, row_number in enumerate(range(start, end + 1)):
+            cells = values[offset] if offset < len(values) else []
+            picked = [cells[i] if i is not None and i < len(cells) else "" for i in indices]
+            rows.append((row_number, dict(zip(headers, picked)) if columns is None else tuple(picked)))
+    return rows
+
 def update_cell_in_sheet(spreadsheet_url_or_id: str, sheet_name: str, row_index: int, col_index: int, value: str) -> bool:
-    """Actualiza una celda específica en una Google Sheet.
+    """Actualiza una celda específica en una Google Sheet de forma inmediata.
+
+    Usa la misma ruta de escritura que los lotes (batch_update_cells). Para escribir
+    estados durante el procesamiento conviene queue_cell_update, que agrupa las celdas.
 
     Args:
         spreadsheet_url_or_id (str): La URL completa de la Google Sheet o su ID.
@@ -89,53 +292,153 @@ def update_cell_in_sheet(spreadsheet_url_or_id: str, sheet_name: str, row_index:
         col_index (int): El índice de la columna a actualizar (1-based).
         value (str): El valor a escribir en la celda.
 
+    Returns:
+        bool: True si la actualización fue exitosa, False en caso contrario.
+    """
+    logger.info(f"Intentando actualizar celda ({row_index}, {col_index}) en '{sheet_name}' con valor '{value}'")
+    return batch_update_cells(spreadsheet_url_or_id, sheet_name, {(row_index, col_index): value})
+
+def queue_cell_update(spreadsheet_url_or_id: str, sheet_name: str, row_index: int, col_index: int, value: str) -> None:
+    """Encola la actualización de una celda para enviarla en lote.
+
+    Las actualizaciones se envían cada CELL_UPDATE_FLUSH_INTERVAL segundos con un
+    único batch_update por hoja, o al llamar a flush_cell_updates().
+
+    Args:
+        spreadsheet_url_or_id (str): La URL completa de la Google Sheet o su ID.
+        sheet_name (str): El nombre de la pestaña (worksheet).
+        row_index (int): El índice de la fila a actualizar (1-based).
+        col_index (int): El índice de la columna a actualizar (1-based).
+        value (str): El valor a escribir en la celda.
+    """
+    queue_row_update(spreadsheet_url_or_id, sheet_name, row_index, {col_index: value})
+
+def queue_row_update(spreadsheet_url_or_id: str, sheet_name: str, row_index: int, values: dict) -> None:
+    """Encola varias celdas de una fila para enviarlas juntas en el mismo batch_update.
+
+    Args:
+        spreadsheet_url_or_id (str): La URL completa de la Google Sheet o su ID.
+        sheet_name (str): El nombre de la pestaña (worksheet).
+        row_index (int): El índice de la fila a actualizar (1-based).
+        values (dict): {col_index (1-based): valor} a escribir en la fila.
+    """
+    global _flusher_thread
+    cells = {(row_index, col_index): value for col_index, value in values.items()}
+    _pending_cell_updates.append((spreadsheet_url_or_id, sheet_name, cells))
+    if len(_pending_cell_updates) >= CELL_UPDATE_MAX_PENDING:
+        _flush_requested.set()
+    if _flusher_thread is None or not _flusher_thread.is_alive():
+        with _flusher_start_lock:
+            if _flusher_thread is None or not _flusher_thread.is_alive():
+                _flusher_thread = threading.Thread(target=_flush_periodically, name="sheets-flusher", daemon=True)
+                _flusher_thread.start()
+
+def _flush_periodically() -> None:
+    """Envía las actualizaciones pendientes cada CELL_UPDATE_FLUSH_INTERVAL segundos.
+
+    El envío se adelanta si se acumulan CELL_UPDATE_MAX_PENDING filas, pero nunca con
+    menos de CELL_UPDATE_MIN_INTERVAL segundos desde el lote anterior.
+    """
+    while True:
+        _flush_requested.wait(CELL_UPDATE_FLUSH_INTERVAL)
+        _flush_requested.clear()
+        if _pending_cell_updates:
+            try:
+                flush_cell_updates()
+            except Exception as e:
+                # El hilo debe sobrevivir: las celdas pendientes se reintentan en el siguiente ciclo
+                logger.error(f"Error inesperado en el envío periódico de actualizaciones: {e}", exc_info=True)
+        time.sleep(CELL_UPDATE_MIN_INTERVAL)
+
+def _row_ranges(cells: dict) -> list[dict]:
+    """Agrupa celdas contiguas de una misma fila en un único rango (ej. D5:E5).
+
+    Args:
+        cells (dict): {(row_index, col_index): valor}.
+
+    Returns:
+        list[dict]: Rangos en el formato esperado por worksheet.batch_update.
+    """
+    ranges = []
+    for row_index, col_index in sorted(cells):
+        previous = ranges[-1] if ranges else None
+        if previous and previous["row"] == row_index and previous["last_col"] == col_index - 1:
+            previous["last_col"] = col_index
+            previous["values"][0].append(cells[(row_index, col_index)])
+        else:
+            ranges.append({"row": row_index, "first_col": col_index, "last_col": col_index,
+                           "values": [[cells[(row_index, col_index)]]]})
+    return [
+        {"range": f"{rowcol_to_a1(r['row'], r['first_col'])}:{rowcol_to_a1(r['row'], r['last_col'])}"
+                  if r["last_col"] != r["first_col"] else rowcol_to_a1(r["row"], r["first_col"]),
+         "values": r["values"]}
+        for r in ranges
+    ]
+
+def failed_cell_update_flushes() -> int:
+    """Devuelve cuántos lotes de actualizaciones fallaron desde el inicio del proceso."""
+    return _failed_flushes
+
+def batch_update_cells(spreadsheet_url_or_id: str, sheet_name: str, cells: dict, requeue_on_transient_error: bool = False) -> bool:
+    """Escribe varias celdas de una pestaña con un único values.batchUpdate.
+
+    Las celdas contiguas de una fila (ej. estado final D y de proceso E) viajan como
+    un solo rango.
+
+    Args:
+        spreadsheet_url_or_id (str): La URL completa de la Google Sheet o su ID.
+        sheet_name (str): El nombre de la pestaña (worksheet).
+        cells (dict): {(row_index, col_index): valor}, con índices 1-based.
+        requeue_on_transient_error (bool, optional): Si la API sigue respondiendo 429/5xx
+            tras los reintentos HTTP, vuelve a encolar las celdas para el siguiente envío.
+            Defaults to False.
+
     Returns:
         bool: True si la actualización fue exitosa, False en caso contrario.
     """
     try:
-        client = get_google_sheets_client()
-        if not client:
-            logger.error("No se pudo obtener el cliente de Google Sheets para actualizar la celda.")
-            return False
-
-        logger.info(f"Intentando actualizar celda ({row_index}, {col_index}) en '{sheet_name}' con valor '{value}'")
-        
-        # Intentar abrir por URL o por ID
-        try:
-            if spreadsheet_url_or_id.startswith("https://"):
-                spreadsheet = client.open_by_url(spreadsheet_url_or_id)
-            else:
-                spreadsheet = client.open_by_key(spreadsheet_url_or_id)
-        except gspread.exceptions.SpreadsheetNotFound:
-            logger.error(f"Spreadsheet no encontrado con URL/ID: {spreadsheet_url_or_id}")
-            return False
-        except Exception as e:
-            logger.error(f"Error al abrir spreadsheet '{spreadsheet_url_or_id}': {e}", exc_info=True)
-            return False
-
-        try:
-            worksheet = spreadsheet.worksheet(sheet_name)
-        except gspread.exceptions.WorksheetNotFound:
-            logger.error(f"Worksheet '{sheet_name}' no encontrado en el spreadsheet.")
-            return False
-        except Exception as e:
-            logger.error(f"Error al abrir worksheet '{sheet_name}': {e}", exc_info=True)
-            return False
-            
-        worksheet.update_cell(row_index, col_index, value)
-        logger.info(f"Celda ({row_index}, {col_index}) en '{sheet_name}' actualizada exitosamente a '{value}'.")
+        worksheet = get_worksheet(spreadsheet_url_or_id, sheet_name)
+        worksheet.batch_update(_row_ranges(cells), value_input_option="RAW")
+        logger.info(f"{len(cells)} celdas actualizadas en '{sheet_name}' en un solo lote.")
         return True
-
     except gspread.exceptions.APIError as e:
-        logger.error(f"Error de API de Google Sheets al actualizar celda ({row_index}, {col_index}) con valor '{value}': {e}", exc_info=True)
-        # Podríamos querer verificar e.response.status_code aquí para más detalles
+        logger.error(f"Error de API de Google Sheets al actualizar en lote {[rowcol_to_a1(*cell) for cell in sorted(cells)]} en '{sheet_name}': {e}", exc_info=True)
+        _reset_cache_on_fatal_error(e)
         if 'exceeded' in str(e).lower() and ('quota' in str(e).lower() or 'limit' in str(e).lower()):
             logger.warning("Se ha alcanzado un límite de cuota de la API de Google Sheets. Intentar más tarde.")
+        status_code = getattr(getattr(e, "response", None), "status_code", None)
+        if requeue_on_transient_error and status_code in SHEETS_TRANSIENT_STATUSES:
+            logger.warning(f"Error {status_code} transitorio: {len(cells)} celdas de '{sheet_name}' vuelven a la cola.")
+            # Al frente de la cola: si una celda se volvió a encolar mientras tanto, su valor
+            # más reciente se aplica después y prevalece en el siguiente lote
+            _pending_cell_updates.appendleft((spreadsheet_url_or_id, sheet_name, cells))
         return False
     except Exception as e:
-        logger.error(f"Error inesperado al actualizar celda ({row_index}, {col_index}) con valor '{value}': {e}", exc_info=True)
+        logger.error(f"Error inesperado al actualizar en lote {[rowcol_to_a1(*cell) for cell in sorted(cells)]} en '{sheet_name}': {e}", exc_info=True)
         return False
 
+def flush_cell_updates() -> bool:
+    """Envía todas las actualizaciones encoladas con un batch_update por hoja.
+
+    Si una misma celda se encoló varias veces, solo se envía el último valor.
+
+    Returns:
+        bool: True si todos los lotes se enviaron correctamente, False en caso contrario.
+    """
+    global _failed_flushes
+    with _flush_lock:
+        batches = {}
+        while _pending_cell_updates:
+            spreadsheet_url_or_id, sheet_name, cells = _pending_cell_updates.popleft()
+            batches.setdefault((spreadsheet_url_or_id, sheet_name), {}).update(cells)
+
+        all_ok = True
+        for (spreadsheet_url_or_id, sheet_name), cells in batches.items():
+            if not batch_update_cells(spreadsheet_url_or_id, sheet_name, cells, requeue_on_transient_error=True):
+                all_ok = False
+                _failed_flushes += 1
+        return all_ok
+
 if __name__ == '__main__':
     # Ejemplo de uso (requiere configuración de credenciales y spreadsheet_details)
     # Descomentar y reemplazar con valores reales para probar.
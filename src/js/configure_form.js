@@ -0,0 +1,138 @@
+// src/js/configure_form.js
+// Configura en una sola pasada el formulario "Crear nueva organización" de E-Socios.
+// Se ejecuta con driver.execute_async_script(script, config); el último argumento es el callback.
+//
+// config: {
+//     orgName:  string | null,                 // valor para el input #name
+//     switches: [string],                      // textos de los switches a activar
+//     fields:   [{name, type, show}]           // campos adicionales ("texto" | "numero")
+// }
+// Resultado: {
+//     name:     bool | null,                   // null si no se pidió
+//     switches: [bool | null],                 // null = switch no apareció en FIELD_TIMEOUT_MS
+//     fields:   [{name, ok, error}]            // se detiene en el primer campo que falla
+// }
+const config = arguments[0];
+const done = arguments[arguments.length - 1];
+
+const FIELD_TIMEOUT_MS = 5000;
+const POLL_INTERVAL_MS = 50;
+const SWITCH_SETTLE_MS = 1000;
+const FIELD_TYPE_BUTTONS = {texto: 'Tipo texto', numero: 'Tipo número'};
+
+// React ignora asignaciones directas a .value: se usa el setter nativo y se emite 'input'
+function setReactInputValue(input, value) {
+    const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    setter.call(input, value);
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+    return input.value === value;
+}
+
+function findSwitchLabel(root, text) {
+    return [...root.querySelectorAll('.MuiFormControlLabel-root')]
+        .find(label => label.innerText.includes(text)) || null;
+}
+
+// Activa el switch de la label (si no lo está) y devuelve su estado, o null si no existe.
+// Si React aplica el cambio de forma diferida, se vuelve a leer el estado hasta SWITCH_SETTLE_MS.
+async function enableSwitch(label) {
+    const checkbox = label && label.querySelector('input[type=checkbox]');
+    if (!checkbox) {
+        return null;
+    }
+    if (!checkbox.checked) {
+        label.click();
+    }
+    return waitFor(() => checkbox.checked, SWITCH_SETTLE_MS).catch(() => false);
+}
+
+// Inputs "Nombre del dato" (requeridos) en orden de aparición
+function fieldNameInputs() {
+    return [...document.querySelectorAll('label')]
+        .filter(label => label.textContent.includes('Nombre del dato') && label.querySelector('.MuiFormLabel-asterisk'))
+        .map(label => label.nextElementSibling && label.nextElementSibling.querySelector('input[type=text]'))
+        .filter(Boolean);
+}
+
+function waitFor(predicate, timeoutMs) {
+    return new Promise((resolve, reject) => {
+        const deadline = Date.now() + timeoutMs;
+        (function poll() {
+            const value = predicate();
+            if (value) {
+                resolve(value);
+            } else if (Date.now() > deadline) {
+                reject(new Error('timeout'));
+            } else {
+                setTimeout(poll, POLL_INTERVAL_MS);
+            }
+        })();
+    });
+}
+
+async function addField(field) {
+    const buttonText = FIELD_TYPE_BUTTONS[field.type];
+    if (!buttonText) {
+        throw new Error(`Tipo de campo no soportado: ${field.type}`);
+    }
+    const button = [...document.querySelectorAll('button')].find(b => b.textContent.includes(buttonText));
+    if (!button) {
+        throw new Error(`Botón '${buttonText}' no encontrado`);
+    }
+
+    // El nuevo input aparece al final, en el índice igual a la cantidad previa
+    const previousCount = fieldNameInputs().length;
+    button.scrollIntoView({block: 'center', inline: 'nearest'});
+    button.click();
+    let input;
+    try {
+        input = await waitFor(() => fieldNameInputs()[previousCount], FIELD_TIMEOUT_MS);
+    } catch (e) {
+        throw new Error("No apareció el campo 'Nombre del dato' tras el clic");
+    }
+    if (!setReactInputValue(input, field.name)) {
+        throw new Error("No se pudo escribir el 'Nombre del dato'");
+    }
+
+    if (field.show !== false) {
+        // El switch "Mostrar al usuario" está en el contenedor más cercano que lo incluya
+        let container = input.parentElement;
+        while (container && !findSwitchLabel(container, 'Mostrar al usuario')) {
+            container = container.parentElement;
+        }
+        if (await enableSwitch(container && findSwitchLabel(container, 'Mostrar al usuario')) === null) {
+            throw new Error("Switch 'Mostrar al usuario' no encontrado");
+        }
+    }
+}
+
+(async function () {
+    const result = {name: null, switches: [], fields: []};
+    try {
+        if (config.orgName !== null && config.orgName !== undefined) {
+            const nameInput = document.getElementById('name');
+            result.name = nameInput ? setReactInputValue(nameInput, config.orgName) : false;
+        }
+        // Los switches pueden tardar en renderizarse: se esperan aquí, sin sondeos de WebDriver
+        for (const text of config.switches || []) {
+            let label = null;
+            try {
+                label = await waitFor(() => findSwitchLabel(document, text), FIELD_TIMEOUT_MS);
+            } catch (e) {
+                // se informa como null
+            }
+            result.switches.push(await enableSwitch(label));
+        }
+        for (const field of config.fields || []) {
+            try {
+                await addField(field);
+                result.fields.push({name: field.name, ok: true, error: null});
+            } catch (e) {
+                result.fields.push({name: field.name, ok: false, error: e.message});
+                break;
+            }
+        }
+    } finally {
+        done(result);
+    }
+})();
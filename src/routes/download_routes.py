@@ -3,15 +3,19 @@
 Blueprint for handling file downloads, e.g., PDF reports.
 """
 import os
+import copy
 import json
-import glob # Import glob for file searching
+import re
+import tempfile
+import threading
+from functools import lru_cache
 from flask import (
     Blueprint,
     render_template,
-    Response,
     request,
     current_app,
     abort,
+    send_file,
     url_for # Added url_for for potential future use or linking within PDF
 )
 from weasyprint import HTML, CSS
@@ -22,9 +26,101 @@ from src.globals import combined_revision_status, combined_status_lock # Import
 # Create the Blueprint
 download_bp = Blueprint('download', __name__)
 
+# PDFs ya generados, por task_id, dentro de REPORTS_DIR. El JSON de un reporte no cambia
+# una vez terminada la tarea, así que el PDF se reutiliza mientras no sea más antiguo que él.
+PDF_CACHE_SUBDIR = 'pdf_cache'
+# Tamaño hasta el que un PDF no cacheable se mantiene en memoria antes de pasar a disco
+PDF_SPOOL_MAX_SIZE = 4 * 1024 * 1024
 
-def load_report_data(task_id):
-    """Helper function to load the final comparison report JSON."""
+# Índice task_id -> slug de los reportes de REPORTS_DIR. Se llena una vez al registrar
+# el blueprint y con cada reporte encontrado después, para no recorrer el directorio
+# en cada descarga cuyo estado ya no está en memoria.
+_task_slug_index = {}
+_task_slug_index_lock = threading.Lock()
+# mtime de REPORTS_DIR en el último recorrido: si no cambió, no hay reportes nuevos que indexar
+_indexed_dir_mtime = None
+
+
+# report_{slug}_{task_id}.json: el task_id es un uuid4 (sin '_'), así que el slug puede
+# contener '_' y se toma todo lo anterior al último separador
+_REPORT_FILENAME_RE = re.compile(r'^report_(?P<slug>.+)_(?P<task_id>[0-9a-f-]{36})\.json$')
+
+
+def _parse_report_filename(filename):
+    """Extrae (slug, task_id) de un nombre report_{slug}_{task_id}.json, o None."""
+    match = _REPORT_FILENAME_RE.match(filename)
+    return (match.group('slug'), match.group('task_id')) if match else None
+
+
+def _index_reports_dir(reports_dir):
+    """Recorre REPORTS_DIR con os.scandir y llena el índice task_id -> slug.
+
+    El recorrido se omite si el directorio no cambió (mismo mtime) desde el anterior.
+    """
+    global _indexed_dir_mtime
+    found = {}
+    try:
+        dir_mtime = os.stat(reports_dir).st_mtime
+        if dir_mtime == _indexed_dir_mtime:
+            return
+        with os.scandir(reports_dir) as entries:
+            for entry in entries:
+                parsed = _parse_report_filename(entry.name)
+                if parsed and entry.is_file():
+                    slug, task_id = parsed
+                    found[task_id] = slug
+    except OSError as e:
+        current_app.logger.warning(f"No se pudo indexar el directorio de reportes {reports_dir}: {e}")
+        return
+    with _task_slug_index_lock:
+        _task_slug_index.update(found)
+        _indexed_dir_mtime = dir_mtime
+
+
+@download_bp.record_once
+def _build_task_slug_index(state):
+    """Indexa los reportes existentes al registrar el blueprint en la app."""
+    reports_dir = state.app.config.get('REPORTS_DIR')
+    if reports_dir:
+        with state.app.app_context():
+            _index_reports_dir(reports_dir)
+
+
+# Hoja de estilos del PDF y configuración de fuentes: pdf_report_style.css es estático,
+# así que se parsea una sola vez por proceso y se comparte entre solicitudes.
+_pdf_stylesheet = None
+_pdf_stylesheet_lock = threading.Lock()
+
+
+def _get_pdf_stylesheet():
+    """Devuelve (CSS, FontConfiguration) del PDF, construyéndolos en la primera llamada.
+
+    Returns:
+        tuple: (CSS, FontConfiguration), o None si el archivo CSS no existe.
+    """
+    global _pdf_stylesheet
+    if _pdf_stylesheet is None:
+        with _pdf_stylesheet_lock:
+            if _pdf_stylesheet is None:
+                # Asegúrate que pdf_report_style.css esté en tu carpeta static/css
+                css_path = os.path.join(current_app.static_folder, 'css', 'pdf_report_style.css')
+                if not os.path.exists(css_path):
+                    current_app.logger.error(f"Archivo CSS para PDF no encontrado en: {css_path}")
+                    return None
+                # Configuración de fuentes (WeasyPrint buscará fuentes del sistema si no se especifica)
+                font_config = FontConfiguration()
+                _pdf_stylesheet = (CSS(filename=css_path, font_config=font_config), font_config)
+    return _pdf_stylesheet
+
+
+def register_report(task_id, slug):
+    """Añade al índice un reporte recién creado (report_{slug}_{task_id}.json)."""
+    with _task_slug_index_lock:
+        _task_slug_index[task_id] = slug
+
+
+def find_report_path(task_id):
+    """Devuelve la ruta del JSON del reporte final de task_id, o None si no se encuentra."""
     # Ensure REPORTS_DIR is accessed via current_app.config
     reports_dir = current_app.config.get('REPORTS_DIR')
     if not reports_dir:
@@ -32,35 +128,23 @@ def load_report_data(task_id):
         return None
         
     # Get task status to find the slug
-    slug = None
     with combined_status_lock: # Access shared status safely
         task_status = combined_revision_status.get(task_id)
-        if not task_status or 'slug' not in task_status:
+        slug = task_status.get('slug') if task_status else None
+    if slug:
+        current_app.logger.info(f"Slug '{slug}' encontrado en el estado en memoria para task_id: {task_id}")
+    else:
+        slug = _task_slug_index.get(task_id)
+        if slug is None:
             current_app.logger.warning(f"Estado o slug no encontrado en memoria para task_id: {task_id}. Intentando buscar archivo...")
-            # Fallback: Search for the report file by pattern
-            file_pattern = os.path.join(reports_dir, f"report_*_{task_id}.json")
-            matching_files = glob.glob(file_pattern)
-            if len(matching_files) == 1:
-                report_path = matching_files[0]
-                filename = os.path.basename(report_path)
-                # Extract slug: report_{slug}_{task_id}.json
-                parts = filename[:-5].split('_') # Remove .json and split
-                if len(parts) == 3 and parts[0] == 'report' and parts[2] == task_id:
-                    slug = parts[1]
-                    current_app.logger.info(f"Slug '{slug}' extraído del nombre de archivo: {filename}")
-                else:
-                     current_app.logger.error(f"No se pudo extraer el slug del nombre de archivo con formato inesperado: {filename}")
-                     return None
-            elif len(matching_files) > 1:
-                 current_app.logger.error(f"Múltiples archivos de reporte encontrados para task_id {task_id}: {matching_files}")
-                 return None
-            else:
-                current_app.logger.error(f"No se encontró el archivo de reporte para task_id: {task_id} usando el patrón {file_pattern}")
+            # Fallback: reporte no registrado; se vuelve a recorrer REPORTS_DIR (fuera del
+            # lock de estado, y solo si el directorio cambió desde el último recorrido)
+            _index_reports_dir(reports_dir)
+            slug = _task_slug_index.get(task_id)
+            if slug is None:
+                current_app.logger.error(f"No se encontró el archivo de reporte para task_id: {task_id} en {reports_dir}")
                 return None # Cannot determine filename without slug or file
-        else:
-            # Slug found in status dictionary
-            slug = task_status.get('slug')
-            current_app.logger.info(f"Slug '{slug}' encontrado en el estado en memoria para task_id: {task_id}")
+        current_app.logger.info(f"Slug '{slug}' encontrado en el índice de reportes para task_id: {task_id}")
     
     # Construct the correct report filename using slug and task_id
     report_filename = f"report_{slug}_{task_id}.json"
@@ -69,29 +153,109 @@ def load_report_data(task_id):
     if not os.path.exists(report_path):
         current_app.logger.warning(f"Report file not found: {report_path}")
         return None
-        
+    return report_path
+
+
+@lru_cache(maxsize=64)
+def _parse_report_json(report_path, mtime):
+    """Parsea el JSON del reporte; mtime forma parte de la clave de la caché.
+
+    Los errores se propagan y lru_cache no los guarda, así que un reporte leído a medio
+    escribir se vuelve a intentar en la siguiente solicitud.
+    """
+    with open(report_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_report_data(task_id, report_path=None):
+    """Helper function to load the final comparison report JSON.
+
+    Args:
+        task_id (str): ID de la tarea.
+        report_path (str, optional): Ruta del JSON si el llamador ya la resolvió con
+            find_report_path. Defaults to None.
+    """
+    if report_path is None:
+        report_path = find_report_path(task_id)
+        if report_path is None:
+            return None
     try:
-        with open(report_path, 'r', encoding='utf-8') as f:
-            report_data = json.load(f)
-        # Add task_id and generation time if not present (useful for template)
-        if 'task_id' not in report_data:
-            report_data['task_id'] = task_id
-        if 'generation_time' not in report_data:
-             report_data['generation_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return report_data
+        # Mientras el archivo no cambie se reutiliza el JSON ya parseado; se entrega una
+        # copia para que ningún llamador modifique la versión cacheada
+        report_data = copy.deepcopy(_parse_report_json(report_path, os.path.getmtime(report_path)))
     except json.JSONDecodeError as e:
         current_app.logger.error(f"Error decoding JSON report {report_path}: {e}")
         return None
     except Exception as e:
         current_app.logger.error(f"Error loading report {report_path}: {e}", exc_info=True)
         return None
+    # Add task_id and generation time if not present (useful for template)
+    if 'task_id' not in report_data:
+        report_data['task_id'] = task_id
+    if 'generation_time' not in report_data:
+         report_data['generation_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return report_data
+
+
+def _cached_pdf_path(task_id, report_path):
+    """Devuelve la ruta del PDF cacheado de task_id y si está vigente respecto al JSON.
+
+    Returns:
+        tuple: (ruta del PDF en caché, True si existe y no es más antiguo que el JSON).
+    """
+    cache_path = os.path.join(current_app.config['REPORTS_DIR'], PDF_CACHE_SUBDIR, f"{task_id}.pdf")
+    try:
+        is_fresh = os.path.getmtime(cache_path) >= os.path.getmtime(report_path)
+    except OSError:
+        is_fresh = False
+    return cache_path, is_fresh
+
+
+def _write_pdf_to_cache(html, css, font_config, cache_path):
+    """Escribe el PDF directamente en la caché, sin materializarlo en memoria.
+
+    Se genera en un archivo temporal único (mkstemp, seguro entre hilos y procesos) y se
+    publica con un reemplazo atómico.
+
+    Returns:
+        bool: True si el PDF quedó guardado en cache_path, False si falló la escritura.
+    """
+    tmp_path = None
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            html.write_pdf(target=tmp_file, stylesheets=[css], font_config=font_config)
+        os.replace(tmp_path, cache_path)
+        return True
+    except OSError as e:
+        current_app.logger.warning(f"No se pudo guardar el PDF en caché {cache_path}: {e}")
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return False
 
 
 @download_bp.route('/download-report/<string:task_id>/pdf')
 def download_report_pdf(task_id):
     """Generates and serves the comparison report as a PDF."""
     current_app.logger.info(f"Solicitud de descarga PDF para task_id: {task_id}")
-    report_data = load_report_data(task_id)
+    pdf_filename = f"reporte_comparativo_{task_id}.pdf"
+    report_path = find_report_path(task_id)
+    if report_path is None:
+        current_app.logger.error(f"No se pudieron cargar los datos del reporte para task_id: {task_id}")
+        abort(404, description="Reporte no encontrado o inválido.")
+
+    # Si el PDF ya se generó a partir de este mismo JSON, se sirve desde disco
+    cache_path, is_fresh = _cached_pdf_path(task_id, report_path)
+    if is_fresh:
+        current_app.logger.info(f"Sirviendo PDF en caché para task_id: {task_id}")
+        return send_file(cache_path, mimetype='application/pdf', as_attachment=True, download_name=pdf_filename)
+
+    report_data = load_report_data(task_id, report_path)
     if report_data is None:
         current_app.logger.error(f"No se pudieron cargar los datos del reporte para task_id: {task_id}")
         abort(404, description="Reporte no encontrado o inválido.")
@@ -101,37 +265,31 @@ def download_report_pdf(task_id):
         # Asegúrate que pdf_report_template.html esté en tu carpeta templates
         html_string = render_template('pdf_report_template.html', report=report_data)
         
-        # Cargar el CSS para el PDF
-        # Asegúrate que pdf_report_style.css esté en tu carpeta static/css
-        css_path = os.path.join(current_app.static_folder, 'css', 'pdf_report_style.css')
-        if not os.path.exists(css_path):
-             current_app.logger.error(f"Archivo CSS para PDF no encontrado en: {css_path}")
+        # Cargar el CSS para el PDF (parseado una sola vez por proceso)
+        stylesheet = _get_pdf_stylesheet()
+        if stylesheet is None:
              # Podrías generar el PDF sin CSS o abortar
              # Abortaremos por ahora para indicar el problema claramente
              abort(500, description="Archivo de estilo para PDF no encontrado.")
+        css, font_config = stylesheet
 
-        # Configuración de fuentes (WeasyPrint buscará fuentes del sistema si no se especifica)
-        font_config = FontConfiguration()
-        
         # Crear el objeto HTML de WeasyPrint
         # base_url ayuda a WeasyPrint a resolver rutas relativas (como la del CSS en el HTML)
         html = HTML(string=html_string, base_url=request.host_url)
         
-        # Cargar el CSS
-        css = CSS(filename=css_path, font_config=font_config)
-        
-        # Generar el PDF en memoria
+        # Generar el PDF directamente en disco y servirlo desde ahí (send_file usa sendfile)
         current_app.logger.info(f"Generando PDF con WeasyPrint para task_id: {task_id}...")
-        pdf_bytes = html.write_pdf(stylesheets=[css], font_config=font_config)
-        current_app.logger.info(f"PDF generado correctamente para task_id: {task_id}. Tamaño: {len(pdf_bytes)} bytes.")
-        
-        # Crear la respuesta para descarga
-        pdf_filename = f"reporte_comparativo_{task_id}.pdf"
-        response = Response(pdf_bytes, mimetype='application/pdf')
+        if _write_pdf_to_cache(html, css, font_config, cache_path):
+            current_app.logger.info(f"PDF generado correctamente para task_id: {task_id}. Tamaño: {os.path.getsize(cache_path)} bytes.")
+            return send_file(cache_path, mimetype='application/pdf', as_attachment=True, download_name=pdf_filename)
+
+        # Sin caché disponible: archivo temporal que solo pasa a disco si el PDF es grande
+        pdf_buffer = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE)
+        html.write_pdf(target=pdf_buffer, stylesheets=[css], font_config=font_config)
+        current_app.logger.info(f"PDF generado correctamente para task_id: {task_id}. Tamaño: {pdf_buffer.tell()} bytes.")
+        pdf_buffer.seek(0)
         # Usar "attachment" para forzar la descarga
-        response.headers['Content-Disposition'] = f'attachment; filename="{pdf_filename}"'
-        
-        return response
+        return send_file(pdf_buffer, mimetype='application/pdf', as_attachment=True, download_name=pdf_filename)
 
     except Exception as e:
         current_app.logger.error(f"Error crítico generando PDF para task_id: {task_id}: {e}", exc_info=True)
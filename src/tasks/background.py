@@ -154,6 +154,9 @@ def _check_and_trigger_comparison(task_id, upload_folder_path):
                 with open(final_report_path, 'w', encoding='utf-8') as f_final:
                     json.dump(final_report_data, f_final, ensure_ascii=False, indent=2)
                 logger.info(f"[BG Task] Task {task_id}: Final report saved successfully.")
+                # Registrar el reporte en el índice de descargas para no tener que buscarlo en disco
+                from src.routes.download_routes import register_report
+                register_report(task_id, slug)
                 
                 # Update status with comparison result and final path
                 # Usar el conteo del nuevo summary
@@ -0,0 +1,81 @@
+"""
+Pool de WebDrivers reutilizables para procesar filas en paralelo.
+"""
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class WebDriverPool:
+    """Pool thread-safe de WebDrivers reutilizables entre filas.
+
+    Cada slot es un dict {"id", "driver", "logged_in", "needs_renav"} que un worker toma
+    con acquire() y devuelve con release(), de modo que un driver nunca lo usan dos hilos
+    a la vez. Los drivers se crean y preparan en paralelo al arrancar el pool; si un slot
+    se descarta tras un error, prepare_slot lo recrea la próxima vez que se use.
+    """
+
+    def __init__(self, size: int, prepare_slot):
+        """
+        Args:
+            size (int): Cantidad de slots (sesiones de Chrome simultáneas).
+            prepare_slot (callable): Recibe un slot y lo deja listo para usarse (crea el
+                driver si falta, inicia sesión...). Devuelve un mensaje de error o None.
+        """
+        self.size = size
+        self._prepare_slot = prepare_slot
+        self._slots = []
+        self._available = queue.Queue()
+
+    def start(self) -> None:
+        """Crea y prepara todos los slots en paralelo y los deja disponibles."""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            self._slots = list(executor.map(self._new_slot, range(1, self.size + 1)))
+        for slot in self._slots:
+            self._available.put(slot)
+        ready = sum(1 for slot in self._slots if slot["driver"] is not None)
+        logger.info(f"Pool de WebDrivers iniciado: {ready}/{self.size} drivers listos.")
+
+    def _new_slot(self, slot_id: int) -> dict:
+        """Crea un slot preparado (o vacío si falló, para reintentar al usarlo).
+
+        Args:
+            slot_id (int): Identificador del slot.
+
+        Returns:
+            dict: Slot {"id", "driver", "logged_in", "needs_renav"}.
+        """
+        slot = {"id": slot_id, "driver": None, "logged_in": False, "needs_renav": False}
+        error = self._prepare_slot(slot)
+        if error:
+            logger.warning(f"Slot {slot_id}: {error}. Se reintentará al procesar una fila.")
+        return slot
+
+    def acquire(self) -> dict:
+        """Toma un slot libre, bloqueando hasta que algún worker devuelva uno."""
+        return self._available.get()
+
+    def release(self, slot: dict) -> None:
+        """Devuelve un slot al pool para la siguiente fila."""
+        self._available.put(slot)
+
+    def discard_driver(self, slot: dict) -> None:
+        """Cierra el driver del slot para que se cree uno nuevo la próxima vez que se use.
+
+        Args:
+            slot (dict): Slot del pool.
+        """
+        driver, slot["driver"], slot["logged_in"] = slot["driver"], None, False
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error cerrando el WebDriver del slot {slot['id']}: {e}")
+
+    def close(self) -> None:
+        """Cierra los drivers de todos los slots."""
+        for slot in self._slots:
+            self.discard_driver(slot)
@@ -21,16 +21,35 @@ if not logger_setup.handlers:
     logger_setup.addHandler(handler)
     logger_setup.setLevel(logging.INFO)
 
+# El logger de selenium registra cada comando HTTP enviado a chromedriver en DEBUG;
+# en los bucles de espera eso solo añade formateo y E/S.
+logging.getLogger("selenium.webdriver.remote").setLevel(logging.WARNING)
+
+# Recursos pesados que el bot no necesita: se bloquean a nivel de red vía CDP.
+# Las cargas de archivos usan send_keys sobre el input y la vista previa es un blob:/data:
+# local, así que no hace falta desbloquear nada durante la carga del logo.
+BLOCKED_ASSET_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.woff", "*.woff2",
+    # Fuentes web y analítica de terceros
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    "*google-analytics.com*", "*googletagmanager.com*",
+]
+
 # Load .env file
 # load_dotenv() # Comentado o eliminado, se cargará en el runner principal
 
-def setup_webdriver(headless_mode: bool):
+def setup_webdriver(headless_mode: bool, block_heavy_assets: bool = False, user_data_dir: str = None):
     """
     Configura y devuelve una instancia del WebDriver de Chrome.
     Usa el modo headless provisto como argumento.
 
     Args:
         headless_mode (bool): True para ejecutar en modo headless, False para modo normal.
+        block_heavy_assets (bool, optional): Bloquea la descarga y el renderizado de imágenes
+            y fuentes (BLOCKED_ASSET_URL_PATTERNS). Solo lo activa el runner de E-Socios;
+            el resto de flujos necesita la página completa. Defaults to False.
+        user_data_dir (str, optional): Directorio de perfil de Chrome a reutilizar entre
+            sesiones (caché y cookies persistentes). Defaults to None (perfil temporal).
 
     Returns:
         webdriver.Chrome: Instancia configurada del WebDriver o None si falla.
@@ -49,6 +68,26 @@ def setup_webdriver(headless_mode: bool):
         chrome_options.add_argument("--window-size=1920,1080") # Puede ayudar en algunos casos
         chrome_options.add_argument("--no-sandbox") # Necesario en algunos entornos CI/Linux
         chrome_options.add_argument("--disable-dev-shm-usage") # Supera problemas de recursos limitados
+        chrome_options.add_argument("--disable-extensions")
+        if user_data_dir:
+            chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+            logger_setup.info(f"Usando perfil de Chrome en: {user_data_dir}")
+        if block_heavy_assets:
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false") # El bot no necesita renderizar imágenes
+        # El formulario no usa WebGL, audio ni servicios en segundo plano de Chrome
+        chrome_options.add_argument("--disable-webgl")
+        chrome_options.add_argument("--disable-3d-apis")
+        chrome_options.add_argument("--disable-audio-output")
+        chrome_options.add_argument("--disable-background-networking")
+        # Sin traducción automática ni back/forward cache: el bot nunca navega hacia atrás
+        chrome_options.add_argument("--disable-features=Translate,BackForwardCache")
+        prefs = {"profile.default_content_setting_values.notifications": 2}
+        if block_heavy_assets:
+            prefs["profile.managed_default_content_settings.images"] = 2
+        chrome_options.add_experimental_option("prefs", prefs)
+        # 'eager' devuelve el control en DOMContentLoaded sin esperar subrecursos;
+        # las esperas explícitas del runner garantizan que los elementos estén listos.
+        chrome_options.page_load_strategy = "eager"
         chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
 
         logger_setup.info("Inicializando ChromeDriverManager...")
@@ -96,11 +135,20 @@ def setup_webdriver(headless_mode: bool):
             # pero es una fuente común de problemas en macOS.
 
         logger_setup.info(f"Usando ruta explícita para el servicio de ChromeDriver: {executable_path}")
-        service = Service(executable_path=executable_path)
+        # Sin log de chromedriver: evita escribir a disco en cada comando
+        service = Service(executable_path=executable_path, service_args=["--log-level=OFF"])
         
         logger_setup.info("Creando instancia del WebDriver de Chrome...")
         driver = webdriver.Chrome(service=service, options=chrome_options)
         logger_setup.info("WebDriver de Chrome creado exitosamente.")
+
+        if block_heavy_assets:
+            try:
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_ASSET_URL_PATTERNS})
+                logger_setup.info(f"Descarga de recursos bloqueada para: {BLOCKED_ASSET_URL_PATTERNS}")
+            except Exception as e_cdp:
+                logger_setup.warning(f"No se pudo bloquear la descarga de recursos vía CDP: {e_cdp}")
         return driver
 
     except Exception as e:
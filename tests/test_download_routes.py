@@ -0,0 +1,131 @@
+"""
+Pruebas de src.routes.download_routes: nombres de reportes y caché de PDFs.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    from src.routes import download_routes
+except ImportError:  # Flask / WeasyPrint no instalados
+    download_routes = None
+
+TASK_ID = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+
+@unittest.skipIf(download_routes is None, "Dependencias de la app Flask no instaladas")
+class ParseReportFilenameTest(unittest.TestCase):
+    """report_{slug}_{task_id}.json -> (slug, task_id)."""
+
+    def test_simple_slug(self):
+        self.assertEqual(download_routes._parse_report_filename(f"report_anef_{TASK_ID}.json"), ("anef", TASK_ID))
+
+    def test_slug_with_underscores(self):
+        self.assertEqual(
+            download_routes._parse_report_filename(f"report_mi_slug_largo_{TASK_ID}.json"),
+            ("mi_slug_largo", TASK_ID),
+        )
+
+    def test_invalid_task_id(self):
+        self.assertIsNone(download_routes._parse_report_filename("report_anef_1234.json"))
+        self.assertIsNone(download_routes._parse_report_filename(f"report_anef_{TASK_ID.upper()}.json"))
+
+    def test_other_files(self):
+        self.assertIsNone(download_routes._parse_report_filename(f"report_{TASK_ID}.json"))
+        self.assertIsNone(download_routes._parse_report_filename(f"report_anef_{TASK_ID}.pdf"))
+        self.assertIsNone(download_routes._parse_report_filename(f"summary_anef_{TASK_ID}.json"))
+
+
+PDF_BYTES = b"%PDF-1.7 reporte"
+
+
+def _fake_html(error=None):
+    """Objeto HTML de WeasyPrint simulado: write_pdf escribe PDF_BYTES en target (o falla)."""
+    def write_pdf(target, **kwargs):
+        if error:
+            raise error
+        target.write(PDF_BYTES)
+    return mock.Mock(write_pdf=mock.Mock(side_effect=write_pdf))
+
+
+@unittest.skipIf(download_routes is None, "Dependencias de la app Flask no instaladas")
+class PdfCacheTest(unittest.TestCase):
+    """PDFs escritos en REPORTS_DIR/pdf_cache y servidos desde ahí."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.reports_dir = tmp_dir.name
+        self.cache_dir = os.path.join(self.reports_dir, download_routes.PDF_CACHE_SUBDIR)
+        self.cache_path = os.path.join(self.cache_dir, f"{TASK_ID}.pdf")
+        self.report_path = os.path.join(self.reports_dir, f"report_anef_{TASK_ID}.json")
+        with open(self.report_path, "w", encoding="utf-8") as f:
+            f.write("{}")
+        app = mock.Mock(config={"REPORTS_DIR": self.reports_dir})
+        self.send_file = mock.Mock(return_value="response")
+        for patcher in (
+            mock.patch.object(download_routes, "current_app", app),
+            mock.patch.object(download_routes, "request", mock.Mock(host_url="http://localhost/")),
+            mock.patch.object(download_routes, "send_file", self.send_file),
+            mock.patch.object(download_routes, "find_report_path", return_value=self.report_path),
+            mock.patch.object(download_routes, "render_template", return_value="<html></html>"),
+            mock.patch.object(download_routes, "_get_pdf_stylesheet", return_value=(mock.Mock(), mock.Mock())),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_write_replaces_cache_file_atomically(self):
+        self.assertTrue(download_routes._write_pdf_to_cache(_fake_html(), None, None, self.cache_path))
+
+        with open(self.cache_path, "rb") as f:
+            self.assertEqual(f.read(), PDF_BYTES)
+        # Del archivo temporal de mkstemp solo queda el PDF publicado con os.replace
+        self.assertEqual(os.listdir(self.cache_dir), [f"{TASK_ID}.pdf"])
+
+    def test_failed_write_leaves_no_files(self):
+        html = _fake_html(error=OSError("disco lleno"))
+
+        self.assertFalse(download_routes._write_pdf_to_cache(html, None, None, self.cache_path))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_cache_is_stale_when_older_than_report(self):
+        download_routes._write_pdf_to_cache(_fake_html(), None, None, self.cache_path)
+        report_mtime = os.path.getmtime(self.report_path)
+
+        os.utime(self.cache_path, (report_mtime - 10, report_mtime - 10))
+        self.assertEqual(download_routes._cached_pdf_path(TASK_ID, self.report_path), (self.cache_path, False))
+        os.utime(self.cache_path, (report_mtime + 10, report_mtime + 10))
+        self.assertEqual(download_routes._cached_pdf_path(TASK_ID, self.report_path), (self.cache_path, True))
+
+    def test_fresh_cache_is_served_without_rendering(self):
+        download_routes._write_pdf_to_cache(_fake_html(), None, None, self.cache_path)
+        os.utime(self.cache_path, (os.path.getmtime(self.report_path) + 10,) * 2)
+
+        with mock.patch.object(download_routes, "HTML") as html_class:
+            download_routes.download_report_pdf(TASK_ID)
+
+        html_class.assert_not_called()
+        self.assertEqual(self.send_file.call_args.args[0], self.cache_path)
+
+    def test_render_is_written_to_cache_and_served_from_disk(self):
+        with mock.patch.object(download_routes, "HTML", return_value=_fake_html()):
+            download_routes.download_report_pdf(TASK_ID)
+
+        self.assertEqual(self.send_file.call_args.args[0], self.cache_path)
+        with open(self.cache_path, "rb") as f:
+            self.assertEqual(f.read(), PDF_BYTES)
+
+    def test_unwritable_cache_falls_back_to_spooled_file(self):
+        with mock.patch.object(download_routes, "HTML", return_value=_fake_html()), \
+                mock.patch.object(download_routes, "_write_pdf_to_cache", return_value=False):
+            download_routes.download_report_pdf(TASK_ID)
+
+        served = self.send_file.call_args.args[0]
+        self.assertIsInstance(served, tempfile.SpooledTemporaryFile)
+        self.assertEqual(served.read(), PDF_BYTES)
+        self.assertFalse(os.path.exists(self.cache_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Pruebas de la recuperación de resultados desde el registro local de src.esocios_runner.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    from src import esocios_runner as runner
+except ImportError:  # Selenium / python-dotenv / gspread no instalados
+    runner = None
+
+SHEET_ID = "sheet-id"
+SHEET_NAME = "Slugs"
+
+
+@unittest.skipIf(runner is None, "Dependencias del runner no instaladas")
+class RecordedResultsTest(unittest.TestCase):
+    """Filas cuyo estado quedó en RESULTS_LOG_FILE pero no llegó al Sheet."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.log_file = os.path.join(tmp_dir.name, "results.csv")
+        self.queue_row_update = mock.Mock()
+        self.process_one_org = mock.Mock(return_value=True)
+        self.failed_flushes = mock.Mock(return_value=0)
+        for patcher in (
+            mock.patch.object(runner, "RESULTS_LOG_FILE", self.log_file),
+            mock.patch.object(runner, "SPREADSHEET_URL_OR_ID", SHEET_ID),
+            mock.patch.object(runner, "SHEET_NAME", SHEET_NAME),
+            mock.patch.object(runner, "queue_row_update", self.queue_row_update),
+            mock.patch.object(runner, "flush_cell_updates", return_value=True),
+            mock.patch.object(runner, "failed_cell_update_flushes", self.failed_flushes),
+            mock.patch.object(runner, "process_one_org", self.process_one_org),
+            mock.patch.object(runner, "WebDriverPool"),
+            mock.patch.object(runner, "flush_screenshots"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _run(self, sheet_rows):
+        with mock.patch.object(runner, "read_pending_rows", return_value=sheet_rows):
+            runner.main_esocios_flow()
+
+    def test_load_filters_by_sheet_and_keeps_last_record(self):
+        runner._record_result(SHEET_ID, SHEET_NAME, 3, "anef", "Error: timeout", "Error Final")
+        runner._record_result(SHEET_ID, "Otra", 4, "otra", "Creada", "Completado")
+        runner._record_result(SHEET_ID, SHEET_NAME, 3, "anef", "Creada", "Completado")
+
+        self.assertEqual(
+            runner._load_recorded_results(SHEET_ID, SHEET_NAME),
+            {3: ("anef", "Creada", "Completado")},
+        )
+
+    def test_recorded_result_is_requeued_instead_of_processed(self):
+        runner._record_result(SHEET_ID, SHEET_NAME, 3, "anef", "Creada", "Completado")
+
+        self._run([(3, ("anef", "ANEF", "")), (4, ("otra", "Otra Org", ""))])
+
+        self.queue_row_update.assert_any_call(SHEET_ID, SHEET_NAME, 3, {
+            runner.STATUS_COLUMN_INDEX: "Creada",
+            runner.PROCESSING_STATUS_COLUMN_INDEX: "Completado",
+        })
+        processed_rows = [call.args[1] for call in self.process_one_org.call_args_list]
+        self.assertEqual(processed_rows, [4])
+
+    def test_record_for_another_slug_is_ignored(self):
+        # La fila 3 ahora contiene otra organización (ej. se insertó una fila en el Sheet)
+        runner._record_result(SHEET_ID, SHEET_NAME, 3, "anef", "Creada", "Completado")
+
+        self._run([(3, ("nueva", "Nueva Org", ""))])
+
+        self.queue_row_update.assert_not_called()
+        self.assertEqual([call.args[1] for call in self.process_one_org.call_args_list], [3])
+
+    def test_log_is_cleared_only_after_every_status_reached_the_sheet(self):
+        runner._record_result(SHEET_ID, SHEET_NAME, 3, "anef", "Creada", "Completado")
+        self.failed_flushes.return_value = 1
+
+        self._run([(3, ("anef", "ANEF", ""))])
+        self.assertTrue(os.path.exists(self.log_file))
+
+        self.failed_flushes.return_value = 0
+        self._run([(3, ("anef", "ANEF", ""))])
+        self.assertFalse(os.path.exists(self.log_file))
+
+
+if __name__ == "__main__":
+    unittest.main()
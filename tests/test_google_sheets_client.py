@@ -0,0 +1,129 @@
+"""
+Pruebas de src.google_sheets_client, sin acceso a la API (worksheet simulado).
+"""
+import unittest
+from unittest import mock
+
+try:
+    from src import google_sheets_client as gsc
+except ImportError:  # gspread / google-auth no instalados
+    gsc = None
+
+
+@unittest.skipIf(gsc is None, "Dependencias de Google Sheets no instaladas")
+class RowRangesTest(unittest.TestCase):
+    """Agrupación de celdas contiguas de una fila en rangos A1."""
+
+    def test_single_cell(self):
+        self.assertEqual(gsc._row_ranges({(5, 4): "ok"}), [{"range": "D5", "values": [["ok"]]}])
+
+    def test_contiguous_cells_in_row_are_merged(self):
+        cells = {(5, 5): "Completado", (5, 4): "Creada"}
+        self.assertEqual(gsc._row_ranges(cells), [{"range": "D5:E5", "values": [["Creada", "Completado"]]}])
+
+    def test_gap_and_other_rows_are_split(self):
+        cells = {(5, 4): "a", (5, 6): "b", (6, 4): "c", (6, 5): "d"}
+        self.assertEqual(gsc._row_ranges(cells), [
+            {"range": "D5", "values": [["a"]]},
+            {"range": "F5", "values": [["b"]]},
+            {"range": "D6:E6", "values": [["c", "d"]]},
+        ])
+
+
+@unittest.skipIf(gsc is None, "Dependencias de Google Sheets no instaladas")
+class ContiguousRunsTest(unittest.TestCase):
+    """Agrupación de filas pendientes en tramos consecutivos."""
+
+    def test_empty(self):
+        self.assertEqual(gsc._contiguous_runs([]), [])
+
+    def test_runs(self):
+        self.assertEqual(gsc._contiguous_runs([2, 3, 4, 7, 9, 10]), [[2, 4], [7, 7], [9, 10]])
+
+
+@unittest.skipIf(gsc is None, "Dependencias de Google Sheets no instaladas")
+class ReadPendingRowsTest(unittest.TestCase):
+    """Lectura de filas pendientes con un worksheet simulado."""
+
+    def setUp(self):
+        self.worksheet = mock.Mock()
+        patcher = mock.patch.object(gsc, "get_worksheet", return_value=self.worksheet)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fetches_only_pending_runs_and_columns(self):
+        headers = ["Slug", "Nombre Organización", "Organización padre", "Estado Final"]
+        self.worksheet.batch_get.side_effect = [
+            # encabezados, columna A (filas 2-6), columna de estado D
+            [[headers], [["a"], ["b"], ["c"], ["d"], ["e"]], [[""], ["Creada"], [""], [""]]],
+            # filas 2 y 4-6, solo hasta la columna B
+            [[["a", "Org A"]], [["c", "Org C"], ["d"], ["e", "Org E"]]],
+        ]
+
+        rows = gsc.read_pending_rows("sheet-id", "Slugs", 4, columns=["Slug", "Nombre Organización"])
+
+        self.assertEqual(self.worksheet.batch_get.call_args_list[1], mock.call(["A2:B2", "A4:B6"]))
+        self.assertEqual(rows, [(2, ("a", "Org A")), (4, ("c", "Org C")), (5, ("d", "")), (6, ("e", "Org E"))])
+
+    def test_without_columns_returns_dicts(self):
+        self.worksheet.batch_get.side_effect = [
+            [[["Slug", "Estado"]], [["a"], ["b"]], [["x"]]],
+            [[["b"]]],
+        ]
+        rows = gsc.read_pending_rows("sheet-id", "Slugs", 2)
+        self.assertEqual(rows, [(3, {"Slug": "b", "Estado": ""})])
+
+
+def _api_error(status_code):
+    """Crea un gspread APIError con la respuesta HTTP indicada."""
+    response = mock.Mock(status_code=status_code)
+    response.json.return_value = {"error": {"code": status_code, "message": "error", "status": "ERROR"}}
+    return gsc.gspread.exceptions.APIError(response)
+
+
+@unittest.skipIf(gsc is None, "Dependencias de Google Sheets no instaladas")
+class FlushRequeueTest(unittest.TestCase):
+    """Reencolado de lotes que siguen fallando con 429/5xx tras los reintentos HTTP."""
+
+    def setUp(self):
+        self.worksheet = mock.Mock()
+        for patcher in (
+            mock.patch.object(gsc, "get_worksheet", return_value=self.worksheet),
+            mock.patch.object(gsc, "_pending_cell_updates", gsc.deque()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        gsc._pending_cell_updates.append(("sheet-id", "Slugs", {(5, 4): "Creada", (5, 5): "Completado"}))
+
+    def test_transient_error_requeues_batch(self):
+        self.worksheet.batch_update.side_effect = _api_error(429)
+
+        self.assertFalse(gsc.flush_cell_updates())
+        self.assertEqual(list(gsc._pending_cell_updates), [("sheet-id", "Slugs", {(5, 4): "Creada", (5, 5): "Completado"})])
+
+    def test_requeued_batch_is_sent_on_next_flush(self):
+        self.worksheet.batch_update.side_effect = [_api_error(503), None]
+
+        self.assertFalse(gsc.flush_cell_updates())
+        self.assertTrue(gsc.flush_cell_updates())
+        self.assertEqual(len(gsc._pending_cell_updates), 0)
+        self.assertEqual(
+            self.worksheet.batch_update.call_args_list[1],
+            mock.call([{"range": "D5:E5", "values": [["Creada", "Completado"]]}], value_input_option="RAW"),
+        )
+
+    def test_client_error_is_not_requeued(self):
+        self.worksheet.batch_update.side_effect = _api_error(400)
+
+        self.assertFalse(gsc.flush_cell_updates())
+        self.assertEqual(len(gsc._pending_cell_updates), 0)
+
+    def test_direct_write_is_not_requeued(self):
+        self.worksheet.batch_update.side_effect = _api_error(429)
+
+        self.assertFalse(gsc.batch_update_cells("sheet-id", "Slugs", {(7, 4): "Error"}))
+        self.assertEqual(len(gsc._pending_cell_updates), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()